@@ -0,0 +1,163 @@
+'''
+Benchmarks du calculateur, résultats enregistrés en JSON pour comparer les commits
+    -load : lecture de la base à froid (CSV), depuis le fichier binaire (.npz) et depuis le cache du processus
+    -lookup : premiere recherche d'un facteur dans un index neuf, recherche mémorisée et évaluation des réponses d'un utilisateur
+    -batch : calculate_batch sur 10^3 à 10^6 répondants synthétiques (répondants par seconde)
+    -chart : rendu d'un barplot (report.EmissionChart et calculator.visualize_emissions)
+
+Les benchmarks tournent dans un dossier temporaire avec basecarbone_sample.csv et un basecarbone-v17-fr.csv synthétique.
+Execution : python benchmarks/bench_calculator.py --output resultats.json
+'''
+
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+import synthetic  # ajoute le dossier du projet au chemin des modules
+
+import numpy as np
+import pandas as pd
+from calculateur import data
+from calculateur import questionnaire
+from calculateur import calculator
+
+SAMPLE_CSV = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'calculateur', 'basecarbone_sample.csv')
+SIZES = [10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6]
+
+def measure(function, repeat=5, setup=None):
+    '''
+    Appelle function repeat fois (setup avant chaque appel, non mesuré)
+
+    Retourne: dictionnaire {'min', 'median', 'repeat'} en secondes
+    '''
+    times = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return {'min': min(times), 'median': statistics.median(times), 'repeat': repeat}
+
+def bench_load(repeat):
+    def cold():
+        data.clear_cache()
+        if os.path.exists(data.SNAPSHOT_PATH):
+            os.remove(data.SNAPSHOT_PATH)
+    results = {'cold': measure(lambda: data.get_base_sample(), repeat, setup=cold)}
+    results['snapshot'] = measure(lambda: data.get_base_sample(), repeat, setup=data.clear_cache)
+    results['cached'] = measure(lambda: data.get_base_sample(), repeat * 100)
+    return results
+
+def bench_lookup(repeat, calls=10000):
+    base_sample = data.get_base_sample()
+    plan = questionnaire.get_plan(base_sample)
+    keys = [(question.get("base"), question.get("attribute")) for question in questionnaire.QUESTIONNAIRE if "base" in question]
+    answers = synthetic.generate_responses(1).iloc[0].to_dict()
+    # FactorIndex mémorise chaque recherche : un index neuf par répétition (construit hors mesure) pour la premiere recherche
+    index = data.FactorIndex(base_sample)
+
+    def fresh_index():
+        nonlocal index
+        index = data.FactorIndex(base_sample)
+
+    def searches():
+        for key in keys:
+            index.lookup(*key)
+
+    def lookups():
+        for i in range(calls):
+            index.lookup(*keys[i % len(keys)])
+
+    def evaluations():
+        for _ in range(calls):
+            plan.to_dicts(*plan.evaluate(plan.answer_vector(answers)), answers)
+
+    timing = measure(searches, repeat, setup=fresh_index)
+    results = {'factor_search': dict(timing, per_call=timing['min'] / len(keys))}
+    for name, function in (('factor_lookup_cached', lookups), ('answer_evaluation', evaluations)):
+        timing = measure(function, repeat)
+        results[name] = dict(timing, per_call=timing['min'] / calls)
+    return results
+
+def bench_batch(sizes, repeat):
+    base_sample = data.get_base_sample()
+    results = {}
+    for n in sizes:
+        responses = synthetic.generate_responses(n)
+        timing = measure(lambda: calculator.calculate_batch(responses, base_sample), repeat if n < 10 ** 6 else 1)
+        results[str(n)] = dict(timing, respondents_per_second=n / timing['min'])
+    return results
+
+def bench_chart(repeat):
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    from calculateur.report import EmissionChart
+    plan = questionnaire.get_plan()
+    answers = synthetic.generate_responses(1).iloc[0].to_dict()
+    detailed_emissions, category_emissions = plan.to_dicts(*plan.evaluate(plan.answer_vector(answers)), answers)
+    chart = EmissionChart()
+    results = {'emission_chart': measure(lambda: chart.render(category_emissions), repeat)}
+
+    def visualize():
+        calculator.visualize_emissions(category_emissions, path='barplot.png', show=False)
+        plt.close('all')
+    results['visualize_emissions'] = measure(visualize, repeat)
+    return results
+
+def environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=os.path.dirname(os.path.abspath(__file__)),
+                                capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {'commit': commit, 'python': platform.python_version(), 'numpy': np.__version__, 'pandas': pd.__version__,
+            'machine': platform.machine(), 'time': time.strftime('%Y-%m-%dT%H:%M:%S')}
+
+def run(sizes=SIZES, repeat=5, full_rows=100000, chart=True):
+    '''
+    Lance tous les benchmarks dans un dossier temporaire
+
+    Retourne: dictionnaire {'environment', 'parameters', 'results'}
+    '''
+    current = os.getcwd()
+    directory = tempfile.mkdtemp()
+    try:
+        os.chdir(directory)
+        shutil.copy(SAMPLE_CSV, data.SAMPLE_PATH)
+        synthetic.write_full_csv(data.FULL_PATH, full_rows)
+        data.clear_cache()
+        results = {'load': bench_load(repeat), 'lookup': bench_lookup(repeat), 'batch': bench_batch(sizes, repeat)}
+        if chart:
+            results['chart'] = bench_chart(repeat)
+    finally:
+        os.chdir(current)
+        data.clear_cache()
+        shutil.rmtree(directory, ignore_errors=True)
+    return {'environment': environment(), 'parameters': {'sizes': list(sizes), 'repeat': repeat, 'full_rows': full_rows},
+            'results': results}
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks du calculateur (résultats en JSON)")
+    parser.add_argument('--output', default='benchmark_results.json', help="fichier JSON des résultats")
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES, help="nombres de répondants pour calculate_batch")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--full-rows', type=int, default=100000, help="lignes du basecarbone-v17-fr.csv synthétique")
+    parser.add_argument('--no-chart', action='store_true', help="ne pas mesurer le rendu des barplots")
+    arguments = parser.parse_args()
+    result = run(arguments.sizes, arguments.repeat, arguments.full_rows, not arguments.no_chart)
+    with open(arguments.output, 'w', encoding='utf-8') as file:
+        json.dump(result, file, indent=2)
+    json.dump(result['results'], sys.stdout, indent=2)
+    print()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+'''
+Temps d'import des modules de calculateur mesuré avec python -X importtime
+Chaque module a un budget en secondes et une liste de modules lourds qu'il ne doit pas charger,
+le script s'arrête en erreur si un budget est dépassé pour repérer les régressions.
+
+Execution : python benchmarks/import_time.py
+'''
+
+import os
+import subprocess
+import sys
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# module du paquet calculateur -> (budget en secondes, modules qui ne doivent pas être importés)
+BUDGETS = {
+    'utils': (0.05, ['numpy', 'pandas']),
+    'questionnaire': (0.3, ['pandas', 'matplotlib', 'seaborn']),
+    'calculator': (0.3, ['pandas', 'matplotlib', 'seaborn']),
+}
+
+def import_times(module):
+    '''
+    Importe calculateur.module dans un nouveau processus avec -X importtime
+
+    Retourne: dictionnaire {module importé: temps cumulé en secondes}
+    '''
+    process = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import calculateur.{module}'],
+                             cwd=PROJECT_DIR, capture_output=True, text=True, check=True)
+    times = {}
+    for line in process.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_time, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(cumulative) / 1e6
+    return times
+
+def check(budgets=BUDGETS, margin=1.0):
+    '''
+    Arguments:
+        margin: facteur appliqué aux budgets (par exemple 2 sur une machine d'intégration continue plus lente),
+                None pour ne vérifier que les modules lourds importés (résultat qui ne dépend pas de la machine)
+
+    Retourne: (temps d'import de chaque module, liste des dépassements)
+    '''
+    results = {}
+    failures = []
+    for module, (budget, forbidden) in budgets.items():
+        times = import_times(module)
+        results[module] = times[f'calculateur.{module}']
+        if margin is not None and results[module] > budget * margin:
+            failures.append(f"{module} : {results[module]:.3f} s pour un budget de {budget * margin:.3f} s")
+        for heavy in forbidden:
+            if heavy in times:
+                failures.append(f"{module} importe {heavy}")
+    return results, failures
+
+if __name__ == '__main__':
+    results, failures = check()
+    for module, seconds in results.items():
+        print(f"{module}: {seconds * 1000:.1f} ms (budget {BUDGETS[module][0] * 1000:.0f} ms)")
+    for failure in failures:
+        print(f"ERREUR {failure}")
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,56 @@
+'''
+Données synthétiques reproductibles pour les benchmarks (graine fixée)
+
+    -generate_responses : Retourne un DataFrame de réponses au questionnaire, une ligne par répondant
+    -write_full_csv : Écrit un fichier au format de basecarbone-v17-fr.csv avec le nombre de lignes choisi
+'''
+
+import os
+import sys
+
+# Dossier du projet : le paquet calculateur s'importe sans installation
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+from calculateur import questionnaire
+
+# Ordre de grandeur des réponses : (moyenne, écart type) avant troncature à 0
+SCALES = {'avion': (2000, 3000), 'TGV': (800, 1000), 'motorisation_km': (150, 120),
+          'Métro': (30, 40), 'RER': (20, 30), 'Bus': (15, 20), 'Gaz': (5000, 3000), 'Electricité': (3000, 1500),
+          'Repas': (5, 4), 'viande': (3, 3)}
+
+def generate_responses(n, seed=0):
+    '''
+    Arguments:
+        n: nombre de répondants
+
+    Retourne: DataFrame avec les colonnes de questionnaire.NUMERIC_INPUTS et questionnaire.CHOICE_INPUTS
+    '''
+    rng = np.random.default_rng(seed)
+    responses = {}
+    for column in questionnaire.NUMERIC_INPUTS:
+        mean, std = SCALES.get(column, (10, 10))
+        responses[column] = np.maximum(rng.normal(mean, std, n), 0).round(1)
+    for column, choices in questionnaire.CHOICE_INPUTS.items():
+        responses[column] = rng.choice(choices, n)
+    return pd.DataFrame(responses)
+
+def write_full_csv(path, rows, seed=0):
+    '''
+    Écrit rows lignes au format de basecarbone-v17-fr.csv : quelques lignes Bus et Bovin viande,
+    le reste avec des noms de base qui ne sont pas gardés par data.read_base_full
+    '''
+    rng = np.random.default_rng(seed)
+    names = np.array([f'Produit {i}' for i in range(1000)] + ['Bus', 'Bovin viande'])
+    # Environ une ligne gardée sur 500
+    kept = rng.random(rows) < 0.002
+    name = np.where(kept, names[-2:][rng.integers(0, 2, rows)], names[:-2][rng.integers(0, 1000, rows)])
+    pd.DataFrame({
+        "Identifiant de l'élément": np.arange(1, rows + 1),
+        'Nom base français': name,
+        'Unité français': 'kgCO2e/unité',
+        'Total poste non décomposé': rng.random(rows).round(4),
+        'Nom attribut français': rng.choice(['moyen', 'rural', 'urbain', ''], rows),
+        'Commentaire français': 'synthétique',
+    }).to_csv(path, index=False)
@@ -0,0 +1,7 @@
+'''
+Calculateur de l'empreinte carbone annuelle
+Les modules s'importent depuis le paquet, par exemple from calculateur import calculator ;
+les scripts se lancent avec python -m (python -m calculateur.main depuis le dossier des CSV).
+'''
+
+__version__ = "0.0.0"
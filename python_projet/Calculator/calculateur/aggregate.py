@@ -0,0 +1,154 @@
+'''
+Statistiques de population calculées au fil de l'eau sur les empreintes carbone
+Aucune ligne par utilisateur n'est gardée : pour chaque sous categorie et chaque grande categorie,
+le nombre, la somme, le minimum et le maximum sont exacts et les quantiles viennent d'un résumé
+à précision relative fixée. Deux agrégats (par exemple de deux processus) se fusionnent avec merge.
+
+    -QuantileSketch : Résumé des quantiles à précision relative (histogramme à pas logarithmique)
+    -PopulationAggregator : Agrégats par sous categorie et par grande categorie
+'''
+
+import math
+import numpy as np
+import pandas as pd
+
+class QuantileSketch:
+    '''
+    Résumé fusionnable des quantiles : chaque valeur est comptée dans une case [gamma^(i-1), gamma^i[
+    avec gamma = (1 + alpha) / (1 - alpha), le quantile retourné est à moins de alpha (en relatif) de la valeur exacte.
+    Les valeurs nulles sont comptées à part, les valeurs négatives dans un second histogramme.
+    Methodes:
+    - update : Ajoute un tableau de valeurs
+    - merge : Ajoute les comptages d'un autre résumé de même précision
+    - quantile : Retourne le quantile q (entre 0 et 1)
+    '''
+    def __init__(self, relative_accuracy=0.01):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.positive = {}
+        self.negative = {}
+        self.zeros = 0
+        self.count = 0
+
+    def _add(self, store, values):
+        indices, counts = np.unique(np.ceil(np.log(values) / self._log_gamma).astype(np.int64), return_counts=True)
+        for index, count in zip(indices.tolist(), counts.tolist()):
+            store[index] = store.get(index, 0) + count
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float).ravel()
+        # NaN et ±inf ne sont pas comptés : un seul inf fausserait somme, moyenne, min, max et quantiles
+        values = values[np.isfinite(values)]
+        if values.size == 0:
+            return
+        self._add(self.positive, values[values > 0])
+        self._add(self.negative, -values[values < 0])
+        self.zeros += int(np.count_nonzero(values == 0))
+        self.count += values.size
+
+    def merge(self, other):
+        if other.gamma != self.gamma:
+            raise ValueError("Les résumés doivent avoir la même précision relative")
+        for store, other_store in ((self.positive, other.positive), (self.negative, other.negative)):
+            for index, count in other_store.items():
+                store[index] = store.get(index, 0) + count
+        self.zeros += other.zeros
+        self.count += other.count
+
+    def quantile(self, q):
+        if self.count == 0:
+            return float('nan')
+        rank = q * (self.count - 1)
+        # Valeurs négatives (de la plus petite à la plus grande), puis zéros, puis valeurs positives
+        buckets = [(-self._value(index), count) for index, count in sorted(self.negative.items(), reverse=True)]
+        buckets.append((0.0, self.zeros))
+        buckets += [(self._value(index), count) for index, count in sorted(self.positive.items())]
+        seen = 0
+        for value, count in buckets:
+            seen += count
+            if seen > rank:
+                return value
+        return buckets[-1][0]
+
+    def _value(self, index):
+        # Milieu de la case en relatif : erreur relative au plus alpha
+        return 2 * self.gamma ** index / (self.gamma + 1)
+
+class PopulationAggregator:
+    '''
+    Agrégats de population pour chaque sous categorie (detailed_emissions) et grande categorie (category_emissions)
+    Methodes:
+    - update : Ajoute les résultats de calculator.calculate_batch (DataFrame)
+    - update_one : Ajoute le résultat d'un utilisateur (dictionnaires)
+    - merge : Ajoute les agrégats d'un autre PopulationAggregator
+    - summary : Retourne un DataFrame nombre, somme, moyenne, min, max et percentiles par clé
+    - top_contributors : Retourne les sous categories qui contribuent le plus au total
+    '''
+    def __init__(self, relative_accuracy=0.01):
+        self.relative_accuracy = relative_accuracy
+        self.detailed = {}
+        self.categories = {}
+
+    def _stats(self, store, key):
+        if key not in store:
+            store[key] = {'count': 0, 'sum': 0.0, 'min': math.inf, 'max': -math.inf,
+                          'sketch': QuantileSketch(self.relative_accuracy)}
+        return store[key]
+
+    def _update(self, store, key, values):
+        values = np.asarray(values, dtype=float)
+        # NaN et ±inf ne sont pas comptés : un seul inf fausserait somme, moyenne, min, max et quantiles
+        values = values[np.isfinite(values)]
+        if values.size == 0:
+            return
+        stats = self._stats(store, key)
+        stats['count'] += values.size
+        stats['sum'] += float(values.sum())
+        stats['min'] = min(stats['min'], float(values.min()))
+        stats['max'] = max(stats['max'], float(values.max()))
+        stats['sketch'].update(values)
+
+    def update(self, detailed_emissions, category_emissions):
+        for key in detailed_emissions.columns:
+            self._update(self.detailed, key, detailed_emissions[key].to_numpy())
+        for key in category_emissions.columns:
+            self._update(self.categories, key, category_emissions[key].to_numpy())
+
+    def update_one(self, detailed_emissions, category_emissions):
+        for key, value in detailed_emissions.items():
+            self._update(self.detailed, key, [value])
+        for key, value in category_emissions.items():
+            self._update(self.categories, key, [value])
+
+    def merge(self, other):
+        for store, other_store in ((self.detailed, other.detailed), (self.categories, other.categories)):
+            for key, other_stats in other_store.items():
+                stats = self._stats(store, key)
+                stats['count'] += other_stats['count']
+                stats['sum'] += other_stats['sum']
+                stats['min'] = min(stats['min'], other_stats['min'])
+                stats['max'] = max(stats['max'], other_stats['max'])
+                stats['sketch'].merge(other_stats['sketch'])
+
+    def summary(self, percentiles=(0.5, 0.9, 0.99), level='detailed'):
+        '''
+        Retourne: DataFrame avec une ligne par clé (level='detailed' pour les sous categories, 'category' pour les grandes categories)
+        '''
+        store = self.detailed if level == 'detailed' else self.categories
+        rows = {}
+        for key, stats in store.items():
+            row = {'count': stats['count'], 'sum': stats['sum'], 'mean': stats['sum'] / stats['count'],
+                   'min': stats['min'], 'max': stats['max']}
+            for percentile in percentiles:
+                row[f'p{percentile * 100:g}'] = stats['sketch'].quantile(percentile)
+            rows[key] = row
+        return pd.DataFrame.from_dict(rows, orient='index')
+
+    def top_contributors(self, n=5):
+        '''
+        Retourne: liste de (sous categorie, somme des émissions, part du total) triée par somme décroissante
+        '''
+        total = sum(stats['sum'] for stats in self.detailed.values())
+        ranking = sorted(((key, stats['sum']) for key, stats in self.detailed.items()), key=lambda item: item[1], reverse=True)
+        return [(key, emissions, emissions / total if total else 0.0) for key, emissions in ranking[:n]]
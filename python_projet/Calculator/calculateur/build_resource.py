@@ -0,0 +1,48 @@
+'''
+Construit le fichier des facteurs compilés livré avec le paquet (questionnaire.RESOURCE)
+Les deux CSV sont lus une seule fois ici ; à l'execution le paquet installé relit ce fichier par mmap, sans CSV.
+Le fichier n'est écrit que si basecarbone_sample.csv et basecarbone-v17-fr.csv sont présents :
+un fichier construit sans la base complète n'aurait pas les facteurs de ENRICHED_BASES.
+
+Execution (depuis le dossier des CSV, avant de construire le paquet) :
+    python -m calculateur.build_resource --sample basecarbone_sample.csv --full basecarbone-v17-fr.csv
+'''
+
+import os
+import argparse
+import hashlib
+from . import data
+from . import questionnaire
+
+def sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def build(sample_path=data.SAMPLE_PATH, full_path=data.FULL_PATH, output=None):
+    '''
+    Compile le questionnaire à partir des CSV et écrit le fichier binaire
+
+    Retourne: le plan écrit
+    '''
+    if output is None:
+        output = os.path.join(os.path.dirname(os.path.abspath(__file__)), questionnaire.RESOURCE)
+    base_sample = data.load_and_clean_data(sample_path, full_path)
+    plan = questionnaire.EvaluationPlan(data.get_factor_index(base_sample))
+    sources = {os.path.basename(path): sha256(path) for path in (sample_path, full_path)}
+    questionnaire.write_resource(plan, output, sources)
+    return plan
+
+def main():
+    parser = argparse.ArgumentParser(description="Construit le fichier des facteurs compilés du paquet")
+    parser.add_argument('--sample', default=data.SAMPLE_PATH)
+    parser.add_argument('--full', default=data.FULL_PATH)
+    parser.add_argument('--output', default=None, help=f"par défaut {questionnaire.RESOURCE} à côté de ce module")
+    arguments = parser.parse_args()
+    plan = build(arguments.sample, arguments.full, arguments.output)
+    print(f"{len(plan.sub_categories)} sous catégories compilées, sans facteur : {', '.join(plan.missing) or 'aucune'}")
+
+if __name__ == '__main__':
+    main()
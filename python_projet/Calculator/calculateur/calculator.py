@@ -4,15 +4,15 @@ Les fonction disponible sont :
     -get_numeric_input
     -get_text_input
     -calculate : Retourne l'empreinte carbone selon les différentes sous categories et selon les grandes categories
+    -calculate_batch : Retourne l'empreinte carbone de chaque répondant d'un fichier d'enquête
     -visualize_emissions : Retourne un barplot qui affiche l'empreinte carbone selon les grandes categories
 '''
 
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-import data
+from . import questionnaire
+from . import instrumentation
 
-base_sample=data.load_and_clean_data()
+# pandas, matplotlib et seaborn sont importés dans les fonctions qui s'en servent :
+# importer calculator pour calculer une empreinte ne charge que NumPy
 
 def get_numeric_input(prompt):
     '''
@@ -37,86 +37,40 @@ def get_text_input(prompt, valid_responses=None):
 def calculate():
     '''
     Permet de calculer l'empreinte carbone selon différentes categories grâce aux données
-    Demande à l'utilisateur de rentrer ses consommations suivant les questions
-    Calcule les emission par categories puis l'empreinte carbone annuelle total
+    Demande à l'utilisateur de rentrer ses consommations suivant les questions de questionnaire.QUESTIONNAIRE
+    Calcule les emission par categories puis l'empreinte carbone annuelle total avec le plan d'évaluation compilé
 
     Retourne: Emission annuelle total et par categorie
     '''
-
-    questions = {
-        "transport": {
-            "avion": "Combien de km parcourez-vous par an en avion ?\n",
-            "TGV": "Combien de km parcourez-vous par an en TGV ?\n",
-            "voiture": "Combien de km parcourez-vous en voiture chaque semaine ?\n",
-            "motorisation": "Quelle motorisation avez-vous (écrire : électrique ou essence) ?\n",
-            "Métro": "Combien de km par semaine prenez-vous le métro ?\n",
-            "RER": "Combien de km par semaine prenez-vous le RER ?\n",
-            "Bus": "Combien de km par semaine prenez-vous le bus?\n",
-        },
-        "energie": {
-            "Gaz": "Quantité annuelle de Gaz consommé chez vous ?\n",
-            "Electricité": "Quantité annuelle d'électricité consommée chez vous ?\n"
-        },
-        "alimentation": {
-            "Repas": "Combien de repas végétariens par semaine ?\n",
-            "viande": "Combien de repas avec de la viande bovine par semaine ?\n"
-        }
-    }
-
-    total_emissions = 0
-    detailed_emissions = {}
-
-    for category in questions:
-        print(f"\n\nCatégorie : {category}")
-        for sub_category in questions[category]:
-            if sub_category == 'motorisation':
-                motorisation = get_text_input(questions[category][sub_category], valid_responses=['électrique', 'essence'])
-                if motorisation == 'electrique':
-                    filter_result = base_sample[(base_sample['Nom base français'] == 'Voiture') &
-                                                (base_sample['Nom attribut français'].str.contains('électrique', case=False))]
-                elif motorisation == 'essence':
-                    filter_result = base_sample[(base_sample['Nom base français'] == 'Voiture particulière') &
-                                                (base_sample['Nom attribut français'].str.contains('essence', case=False))]
-                if filter_result.empty:
-                    print("Aucune donnée d'émission trouvée pour cette motorisation.")
-                    continue
-
-                emission_factor = filter_result['Total poste non décomposé'].values[0]
-                km_per_week = get_numeric_input("Combien de km parcourez-vous en voiture chaque semaine ?\n")
-                answer = km_per_week * 52  # Convert weekly to annual
-                emissions = answer * emission_factor
-                sub_category = f"voiture_{motorisation}"
-            else:
-                answer = get_numeric_input(questions[category][sub_category])
-                if sub_category in ['Voiture particulière', 'Métro', 'RER', 'Bus']:
-                    answer = answer * 52  # Convert weekly to annual
-                filter_result = base_sample[(base_sample['Nom base français'].str.contains(sub_category, case=False))]
-
-                emission_factor = filter_result['Total poste non décomposé'].values[0]
-                emissions = answer * emission_factor
-
-            total_emissions += emissions
-            detailed_emissions[sub_category] = emissions
+    plan = questionnaire.get_compiled_plan()
+    answers = {}
+    category = None
+
+    for question in questionnaire.QUESTIONNAIRE:
+        if question["category"] != category:
+            category = question["category"]
+            print(f"\n\nCatégorie : {category}")
+        sub_category = question["sub_category"]
+        if "choices" in question:
+            choice = get_text_input(question["question"], valid_responses=list(question["choices"]))
+            if question["choices"][choice]["sub_category"] in plan.missing:
+                print("Aucune donnée d'émission trouvée pour cette motorisation.")
+                continue
+            answers[sub_category] = choice
+            answers[question["quantity"]] = get_numeric_input(question["quantity_question"])
+        elif sub_category in plan.missing:
+            print(f"Aucune donnée d'émission trouvée pour {sub_category}.")
+        else:
+            answers[sub_category] = get_numeric_input(question["question"])
+
+    detailed, category_totals = plan.evaluate(plan.answer_vector(answers))
+    detailed_emissions, category_emissions = plan.to_dicts(detailed, category_totals, answers)
 
     print("\nBilan des émissions annuelles:")
     for sub_category, emissions in detailed_emissions.items():
         print(f"{sub_category}: {emissions:.2f} kg de CO2")
 
-    print(f"\nTotal annuel: {total_emissions:.2f} kg de CO2")
-
-    category_emissions = {
-        "transport": 0,
-        "energie": 0,
-        "alimentation": 0
-    }
-
-    for sub_category, emissions in detailed_emissions.items():
-        if sub_category in questions["transport"]:
-            category_emissions["transport"] += emissions
-        elif sub_category in questions["energie"]:
-            category_emissions["energie"] += emissions
-        elif sub_category in questions["alimentation"]:
-            category_emissions["alimentation"] += emissions
+    print(f"\nTotal annuel: {sum(detailed_emissions.values()):.2f} kg de CO2")
 
     print("\nBilan des émissions annuelles par grande catégorie:")
     for category, emissions in category_emissions.items():
@@ -127,10 +81,39 @@ def calculate():
     # Visualisation
     #visualize_emissions(detailed_emissions)
 
-def visualize_emissions(detailed_emissions):
+def calculate_batch(responses, base_sample=None, plan=None):
+    '''
+    Calcule l'empreinte carbone de tous les répondants d'un fichier d'enquête en une seule passe NumPy.
+    Les réponses sont converties en matrice puis évaluées avec le plan compilé, comme dans calculate().
+
+    Arguments:
+        responses: DataFrame avec une ligne par répondant et les colonnes de questionnaire.NUMERIC_INPUTS
+                   et 'motorisation' ('électrique' ou 'essence')
+        base_sample: Base des facteurs d'emission, par défaut data.get_base_sample(), ou le plan du paquet sans les CSV (voir questionnaire.get_plan)
+        plan: Plan d'évaluation déjà compilé (par exemple store.FactorStore.plan pour une version), prioritaire sur base_sample
+
+    Retourne: (detailed_emissions, category_emissions) sous forme de DataFrame indexés comme responses
+    '''
+    import pandas as pd
+    if plan is None:
+        plan = questionnaire.get_plan(base_sample)
+    detailed, category_totals = plan.evaluate(plan.answer_matrix(responses))
+    detailed_emissions = pd.DataFrame(detailed, index=responses.index, columns=plan.sub_categories)
+    category_emissions = pd.DataFrame(category_totals, index=responses.index, columns=plan.categories)
+    return detailed_emissions, category_emissions
+
+def visualize_emissions(detailed_emissions, path='Barplot empreinte carbone', show=True):
     ''' 
     Retourne un barplot de l'empreinte carbone par categorie
+    Le barplot est enregistré dans path ; show=False pour ne pas l'afficher (pour de nombreux utilisateurs voir report.py)
     '''
+    with instrumentation.stage('visualize_emissions', rows=len(detailed_emissions)):
+        _plot_emissions(detailed_emissions, path, show)
+
+def _plot_emissions(detailed_emissions, path, show):
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
     categories = list(detailed_emissions.keys())
     emissions = list(detailed_emissions.values())
 
@@ -146,5 +129,6 @@ def visualize_emissions(detailed_emissions):
     # Ajouter des étiquettes au-dessus des barres
     for i, value in enumerate(emissions):
         ax.text(i, value + 0.05, f'{value:.2f}', ha='center')
-    plt.savefig('Barplot empreinte carbone')
-    plt.show()
+    plt.savefig(path)
+    if show:
+        plt.show()
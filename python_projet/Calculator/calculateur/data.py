@@ -1,20 +1,328 @@
-''' 
+'''
 Lire les diffrents fichier et enrichi la base de données basecarbone_sample.csv à partir de basecarbone-v17-fr.csv
+Fonctions et class disponibles :
+    -load_and_clean_data : Retourne la base des facteurs d'emission avec son index
+    -read_base_full : Lit basecarbone-v17-fr.csv par morceaux en ne gardant que les lignes utiles
+    -get_base_sample : Retourne la base chargée une seule fois par processus, rechargée si les fichiers changent
+    -save_snapshot : Enregistre la base nettoyée dans un fichier binaire .npz
+    -load_snapshot : Relit la base depuis le fichier binaire si elle correspond aux fichiers sources
+    -clear_cache : Vide le cache de get_base_sample
+    -normalize, tokenize, fingerprint : voir utils.py
+    -FactorIndex : Index des facteurs d'emission par nom de base et attribut
+    -get_factor_index : Retourne l'index associé à une base
+    -derived, forget : Objets construits une seule fois pour une base (index, plan...), oubliés après une modification sur place
+    -SearchIndex : Index inversé pour la recherche plein texte dans les noms de base et attributs
+    -search : Retourne les lignes de la base les mieux classées pour une recherche
 '''
 
-import pandas as pd 
+import os
+import json
+import weakref
+import math
+import heapq
+import bisect
+import numpy as np
+import pandas as pd
+from .utils import normalize, tokenize, fingerprint
+from . import instrumentation
+
+SAMPLE_PATH = 'basecarbone_sample.csv'
+FULL_PATH = 'basecarbone-v17-fr.csv'
+SNAPSHOT_PATH = 'basecarbone_snapshot.npz'
+
+COMMON_COLUMNS = ['Identifiant de l\'élément', 'Nom base français', 'Unité français', 'Total poste non décomposé', 'Nom attribut français']
+# Colonnes gardées seulement si le fichier les contient (incertitude en % du facteur, categorie de la Base Carbone)
+OPTIONAL_COLUMNS = ['Incertitude', 'Code de la catégorie']
+# Noms de base de basecarbone-v17-fr.csv ajoutés à basecarbone_sample.csv
+ENRICHED_BASES = ['Bus', 'Bovin viande']
+CHUNKSIZE = 50000
+
+# (chemins absolus des fichiers, noms de base ajoutés) -> (empreinte, base chargée)
+_cache = {}
+# id de la base -> (référence faible vers la base, {nom: objet construit à partir de cette base})
+_derived = {}
 
-def load_and_clean_data():
+def load_and_clean_data(sample_path=SAMPLE_PATH, full_path=FULL_PATH, enriched_bases=ENRICHED_BASES):
     '''
     Lire et mettre en forme les données necessaire pour le calculateur
+    basecarbone_sample.csv est enrichi des lignes de basecarbone-v17-fr.csv dont le nom de base est dans enriched_bases
+    L'index des facteurs est construit une seule fois pour la base (voir get_factor_index)
+    '''
+    with instrumentation.stage('load_and_clean_data') as timing:
+        base_sample = pd.read_csv(sample_path,sep=';')
+        filtered_data_common = read_base_full(full_path, enriched_bases)
+        base_sample_enriched = pd.concat([base_sample, filtered_data_common])
+        base_sample = base_sample_enriched
+        get_factor_index(base_sample)
+        timing.rows = len(base_sample)
+    return base_sample
+
+def read_base_full(full_path=FULL_PATH, enriched_bases=ENRICHED_BASES, chunksize=CHUNKSIZE):
     '''
-    base_sample = pd.read_csv('basecarbone_sample.csv',sep=';')
-    base_full = pd.read_csv('basecarbone-v17-fr.csv',sep=',')
+    Lit basecarbone-v17-fr.csv par morceaux de chunksize lignes en ne chargeant que COMMON_COLUMNS (et OPTIONAL_COLUMNS si présentes).
+    Les lignes dont le nom de base n'est pas dans enriched_bases sont écartées à chaque morceau,
+    la mémoire utilisée reste donc bornée par la taille d'un morceau.
 
-    filtered_data =pd.concat([base_full[base_full['Nom base français']== "Bus"], base_full[base_full['Nom base français']== "Bovin viande" ]])
-    common_columns = ['Identifiant de l\'élément', 'Nom base français', 'Unité français', 'Total poste non décomposé', 'Nom attribut français']
-    filtered_data_common = filtered_data[common_columns]
-    base_sample_enriched = pd.concat([base_sample, filtered_data_common])
-    base_sample = base_sample_enriched
+    Retourne: DataFrame des lignes gardées, groupées dans l'ordre de enriched_bases
+    '''
+    order = {name: position for position, name in enumerate(enriched_bases)}
+    columns = COMMON_COLUMNS + OPTIONAL_COLUMNS
+    chunks = []
+    with instrumentation.stage('read_base_full') as timing:
+        for chunk in pd.read_csv(full_path, sep=',', usecols=lambda column: column in columns, chunksize=chunksize):
+            timing.rows += len(chunk)
+            chunks.append(chunk[chunk['Nom base français'].isin(order)])
+    filtered_data = pd.concat(chunks) if chunks else pd.DataFrame(columns=COMMON_COLUMNS)
+    # Même ordre que la concaténation base par base : la premiere ligne trouvée pour un nom reste la même
+    filtered_data = filtered_data.iloc[np.argsort(filtered_data['Nom base français'].map(order).to_numpy(), kind='stable')]
+    return filtered_data[[column for column in columns if column in filtered_data]]
+
+def get_base_sample(sample_path=SAMPLE_PATH, full_path=FULL_PATH, snapshot_path=SNAPSHOT_PATH, enriched_bases=ENRICHED_BASES):
+    '''
+    Retourne la base des facteurs d'emission, lue au premier appel puis gardée en mémoire pour le processus.
+    La base est relue si l'un des fichiers sources a changé (chemin, date de modification ou taille).
+    La lecture passe par le fichier binaire snapshot_path tant qu'il correspond aux fichiers sources,
+    sinon les CSV sont relus et le fichier binaire est reconstruit (snapshot_path=None pour s'en passer).
+    La liste enriched_bases fait partie de l'empreinte : la changer reconstruit la base.
+    '''
+    key = (os.path.abspath(sample_path), os.path.abspath(full_path), tuple(enriched_bases))
+    current = fingerprint(sample_path, full_path) + (tuple(enriched_bases),)
+    cached = _cache.get(key)
+    if cached is None or cached[0] != current:
+        base_sample = None
+        if snapshot_path is not None:
+            with instrumentation.stage('load_snapshot') as timing:
+                base_sample = load_snapshot(snapshot_path, current)
+                timing.rows = len(base_sample) if base_sample is not None else 0
+        if base_sample is None:
+            base_sample = load_and_clean_data(sample_path, full_path, enriched_bases)
+            if snapshot_path is not None:
+                save_snapshot(base_sample, snapshot_path, current)
+        cached = (current, base_sample)
+        _cache[key] = cached
+    return cached[1]
+
+def save_snapshot(base_sample, path, source_fingerprint):
+    '''
+    Enregistre la base dans un fichier .npz : colonnes numériques telles quelles, colonnes texte en codes de categories.
+    L'empreinte des fichiers sources, l'index des lignes et le type de chaque colonne sont enregistrés avec la base.
+    Le fichier est écrit sous un nom temporaire puis renommé, un autre processus ne lit jamais un fichier incomplet.
+    '''
+    arrays = {
+        'fingerprint': np.array(json.dumps(source_fingerprint)),
+        'columns': np.array(list(base_sample.columns)),
+        'dtypes': np.array([str(dtype) for dtype in base_sample.dtypes]),
+        'index': base_sample.index.to_numpy(),
+    }
+    for i, column in enumerate(base_sample.columns):
+        values = base_sample[column]
+        if pd.api.types.is_numeric_dtype(values):
+            arrays[f'values_{i}'] = values.to_numpy()
+        else:
+            categorical = pd.Categorical(values.astype('object').where(values.notna(), None))
+            arrays[f'codes_{i}'] = categorical.codes
+            arrays[f'categories_{i}'] = np.array(categorical.categories, dtype=str)
+    temporary_path = f'{path}.{os.getpid()}.tmp.npz'
+    try:
+        np.savez(temporary_path, **arrays)
+        os.replace(temporary_path, path)
+    except OSError:
+        # Dossier en lecture seule : la base reste utilisable sans fichier binaire
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+
+def load_snapshot(path, source_fingerprint):
+    '''
+    Relit la base enregistrée par save_snapshot, avec les mêmes types de colonnes et le même index que
+    la lecture des CSV (les colonnes texte sont reconverties depuis les categories).
+
+    Retourne: DataFrame avec son index des facteurs, ou None si le fichier est absent, illisible
+              ou si son empreinte ne correspond pas à source_fingerprint
+    '''
+    try:
+        with np.load(path, allow_pickle=False) as snapshot:
+            if str(snapshot['fingerprint']) != json.dumps(source_fingerprint):
+                return None
+            index = snapshot['index']
+            columns = {}
+            for i, column in enumerate(snapshot['columns']):
+                if f'values_{i}' in snapshot:
+                    columns[str(column)] = pd.Series(snapshot[f'values_{i}'])
+                else:
+                    categorical = pd.Categorical.from_codes(snapshot[f'codes_{i}'], snapshot[f'categories_{i}'])
+                    columns[str(column)] = pd.Series(categorical).astype(str(snapshot['dtypes'][i]))
+        base_sample = pd.DataFrame(columns)
+        # L'index de la concaténation des deux CSV (avec des doublons) est gardé tel quel
+        base_sample.index = index
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    get_factor_index(base_sample)
     return base_sample
-    
\ No newline at end of file
+
+def clear_cache():
+    '''
+    Vide le cache de get_base_sample : le prochain appel relit les fichiers
+    '''
+    _cache.clear()
+
+class FactorIndex:
+    '''
+    Index des facteurs d'emission ('Total poste non décomposé') construit une seule fois à partir de la base.
+    Les noms de base et les attributs sont normalisés (sans accent ni majuscule).
+    Methodes:
+    - lookup : Retourne le facteur d'une sous categorie, éventuellement filtré par attribut
+    - lookup_uncertainty : Retourne l'incertitude relative (colonne 'Incertitude') de la même ligne
+    '''
+    def __init__(self, base_sample):
+        # nom de base normalisé -> [(attribut normalisé, facteur, incertitude), ...] dans l'ordre de la base
+        self.rows = {}
+        self._resolved = {}
+        names = base_sample['Nom base français'].map(normalize)
+        attributes = base_sample['Nom attribut français'].map(normalize)
+        factors = base_sample['Total poste non décomposé'].to_numpy(dtype=float)
+        if 'Incertitude' in base_sample:
+            uncertainties = pd.to_numeric(base_sample['Incertitude'], errors='coerce').to_numpy(dtype=float) / 100
+        else:
+            uncertainties = np.full(len(factors), np.nan)
+        for name, attribute, factor, uncertainty in zip(names, attributes, factors, uncertainties):
+            self.rows.setdefault(name, []).append((attribute, factor, uncertainty))
+
+    def lookup(self, name, attribute=None):
+        '''
+        Retourne le facteur d'emission de la premiere ligne correspondante, None si aucune ligne ne correspond.
+        Le résultat est mémorisé : seule la premiere recherche parcourt les noms de base.
+
+        Arguments:
+            name: Sous categorie recherchée dans 'Nom base français' (contenue dans le nom, comme str.contains)
+            attribute: Si renseigné, le nom de base doit être exactement name et l'attribut doit contenir attribute
+
+        Retourne: float ou None
+        '''
+        row = self._row(name, attribute)
+        return row[1] if row is not None else None
+
+    def lookup_uncertainty(self, name, attribute=None):
+        '''
+        Retourne l'incertitude relative (0.1 pour 10%) de la ligne retenue par lookup, NaN si elle n'est pas renseignée
+        '''
+        row = self._row(name, attribute)
+        return row[2] if row is not None else np.nan
+
+    def _row(self, name, attribute):
+        key = (normalize(name), normalize(attribute) if attribute is not None else None)
+        if key not in self._resolved:
+            self._resolved[key] = self._search(*key)
+        return self._resolved[key]
+
+    def _search(self, name, attribute):
+        if attribute is None:
+            for base_name, rows in self.rows.items():
+                if name in base_name:
+                    return rows[0]
+            return None
+        for row in self.rows.get(name, []):
+            if attribute in row[0]:
+                return row
+        return None
+
+def derived(base_sample, name, build):
+    '''
+    Retourne l'objet name construit par build(base_sample), construit une seule fois tant que la base existe.
+    Les objets sont liés à cet objet DataFrame précis : une copie, un filtre ou un assign de la base
+    construit les siens (contrairement à base_sample.attrs, que pandas recopie sur les tables dérivées).
+    Une base modifiée sur place doit être oubliée avec forget.
+    '''
+    key = id(base_sample)
+    entry = _derived.get(key)
+    if entry is None or entry[0]() is not base_sample:
+        def remove(reference, key=key):
+            if key in _derived and _derived[key][0] is reference:
+                del _derived[key]
+        entry = _derived[key] = (weakref.ref(base_sample, remove), {})
+    objects = entry[1]
+    if name not in objects:
+        objects[name] = build(base_sample)
+    return objects[name]
+
+def forget(base_sample):
+    '''
+    Oublie les index et plans construits pour la base (après une modification sur place)
+    '''
+    _derived.pop(id(base_sample), None)
+
+def get_factor_index(base_sample):
+    '''
+    Retourne l'index des facteurs de la base, construit au premier appel pour cette base
+    '''
+    return derived(base_sample, 'factor_index', FactorIndex)
+
+class SearchIndex:
+    '''
+    Index inversé des noms de base et attributs (mots sans accent ni majuscule), classement BM25.
+    Les mots du nom de base comptent double par rapport à ceux de l'attribut.
+    Methode:
+    - search : Retourne les lignes les mieux classées pour une recherche
+    '''
+    K1 = 1.2
+    B = 0.75
+    NAME_WEIGHT = 2
+
+    def __init__(self, base_sample):
+        self.identifiers = base_sample['Identifiant de l\'élément'].tolist()
+        self.names = base_sample['Nom base français'].tolist()
+        self.attributes = base_sample['Nom attribut français'].tolist()
+        self.units = base_sample['Unité français'].tolist()
+        self.factors = base_sample['Total poste non décomposé'].to_numpy(dtype=float).tolist()
+        self.postings = {}  # mot -> {ligne: fréquence pondérée}
+        lengths = []
+        for row, (name, attribute) in enumerate(zip(self.names, self.attributes)):
+            name_tokens, attribute_tokens = tokenize(name), tokenize(attribute)
+            for tokens, weight in ((name_tokens, self.NAME_WEIGHT), (attribute_tokens, 1)):
+                for token in tokens:
+                    postings = self.postings.setdefault(token, {})
+                    postings[row] = postings.get(row, 0) + weight
+            lengths.append(self.NAME_WEIGHT * len(name_tokens) + len(attribute_tokens))
+        self.lengths = lengths
+        self.average_length = sum(lengths) / len(lengths) if lengths else 1.0
+        self.tokens = sorted(self.postings)
+        self.idf = {token: math.log(1 + (len(lengths) - len(postings) + 0.5) / (len(postings) + 0.5))
+                    for token, postings in self.postings.items()}
+
+    def _expand(self, token, prefix):
+        if not prefix:
+            return [token] if token in self.postings else []
+        start = bisect.bisect_left(self.tokens, token)
+        end = bisect.bisect_left(self.tokens, token + '\uffff')
+        return self.tokens[start:end]
+
+    def search(self, query, limit=10, prefix=True):
+        '''
+        Recherche les lignes de la base correspondant aux mots de query (sans accent ni majuscule).
+
+        Arguments:
+            query: texte recherché, par exemple 'voiture essence'
+            limit: nombre maximal de résultats
+            prefix: si True un mot de la recherche trouve aussi les mots qui commencent par lui ('elec' -> 'electricite')
+
+        Retourne: liste de dictionnaires (identifiant, nom, attribut, unité, facteur, score) triée par score décroissant
+        '''
+        scores = {}
+        for query_token in tokenize(query):
+            for token in self._expand(query_token, prefix):
+                idf = self.idf[token]
+                for row, frequency in self.postings[token].items():
+                    norm = self.K1 * (1 - self.B + self.B * self.lengths[row] / self.average_length)
+                    scores[row] = scores.get(row, 0.0) + idf * frequency * (self.K1 + 1) / (frequency + norm)
+        best = heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], -item[0]))
+        return [{'identifier': self.identifiers[row], 'name': self.names[row], 'attribute': self.attributes[row],
+                 'unit': self.units[row], 'factor': self.factors[row], 'score': score}
+                for row, score in best]
+
+def search(query, base_sample=None, limit=10, prefix=True):
+    '''
+    Recherche plein texte dans la base (data.get_base_sample() par défaut).
+    L'index inversé est construit une seule fois pour la base (voir derived).
+    '''
+    if base_sample is None:
+        base_sample = get_base_sample()
+    return derived(base_sample, 'search_index', SearchIndex).search(query, limit, prefix)
@@ -0,0 +1,105 @@
+'''
+Mesure optionnelle du temps passé dans chaque étape du calculateur (lecture des CSV, résolution des facteurs,
+regroupement par grande categorie, barplot)
+Désactivée par défaut : une étape ne coûte alors qu'un test de booléen. Elle s'active avec enable()
+ou avec la variable d'environnement CALCULATEUR_TIMING (1 pour garder les mesures en mémoire,
+ou le chemin d'un fichier où chaque étape est ajoutée en JSON lines).
+Pour chaque étape sont gardés le nombre d'appels, le temps total (secondes) et le nombre de lignes traitées.
+
+    -stage : Contexte qui mesure une étape
+    -enable, disable, reset : Active, désactive, remet à zéro les mesures
+    -report : Retourne les mesures par étape (dictionnaire)
+'''
+
+import os
+import json
+import time
+
+_state = {'enabled': False, 'path': None, 'stages': {}}
+
+class _Stage:
+    '''
+    Mesure d'une étape en cours ; rows peut être renseigné dans le bloc quand le nombre de lignes n'est connu qu'à la fin
+    '''
+    __slots__ = ('name', 'rows', 'start')
+
+    def __init__(self, name, rows):
+        self.name = name
+        self.rows = rows
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        record(self.name, time.perf_counter() - self.start, self.rows)
+        return False
+
+class _NullStage:
+    '''
+    Étape quand la mesure est désactivée : ne fait rien, rows vaut toujours 0
+    '''
+    __slots__ = ()
+    rows = property(lambda self: 0, lambda self, value: None)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+_NULL_STAGE = _NullStage()
+
+def stage(name, rows=0):
+    '''
+    Contexte qui mesure une étape, par exemple :
+        with instrumentation.stage('roll_up', rows=len(answers)):
+            ...
+
+    Retourne: objet dont l'attribut rows peut être modifié dans le bloc
+    '''
+    if not _state['enabled']:
+        return _NULL_STAGE
+    return _Stage(name, rows)
+
+def record(name, seconds, rows=0):
+    '''
+    Ajoute une mesure à l'étape name, et une ligne JSON au fichier si enable a reçu un chemin
+    '''
+    stats = _state['stages'].get(name)
+    if stats is None:
+        stats = _state['stages'][name] = {'calls': 0, 'seconds': 0.0, 'rows': 0}
+    stats['calls'] += 1
+    stats['seconds'] += seconds
+    stats['rows'] += int(rows)
+    if _state['path'] is not None:
+        line = json.dumps({'stage': name, 'seconds': seconds, 'rows': int(rows), 'pid': os.getpid(), 'time': time.time()})
+        with open(_state['path'], 'a', encoding='utf-8') as file:
+            file.write(line + '\n')
+
+def enable(path=None):
+    '''
+    Active la mesure. Si path est donné, chaque étape mesurée y est ajoutée en JSON lines.
+    '''
+    _state['enabled'] = True
+    _state['path'] = path
+
+def disable():
+    _state['enabled'] = False
+    _state['path'] = None
+
+def is_enabled():
+    return _state['enabled']
+
+def reset():
+    _state['stages'] = {}
+
+def report():
+    '''
+    Retourne: dictionnaire {étape: {'calls', 'seconds', 'rows', 'mean_seconds'}}
+    '''
+    return {name: dict(stats, mean_seconds=stats['seconds'] / stats['calls']) for name, stats in _state['stages'].items()}
+
+_environment = os.environ.get('CALCULATEUR_TIMING')
+if _environment:
+    enable(None if _environment == '1' else _environment)
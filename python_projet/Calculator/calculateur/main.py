@@ -1,14 +1,11 @@
 ''' 
-Execution du calculateur d'empreinte carbone
+Execution du calculateur d'empreinte carbone : python -m calculateur.main depuis le dossier des CSV
 '''
 
-import data
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-import calculator
+from . import data
+from . import calculator
 
-base_sample=data.load_and_clean_data()
+base_sample=data.get_base_sample()
 print(base_sample.head())
 detailed_emissions = calculator.calculate()
 
@@ -0,0 +1,104 @@
+'''
+Empreinte carbone d'achats quelconques désignés par l'identifiant Base Carbone ('Identifiant de l'élément')
+Les réponses sont au format long, une ligne par (répondant, identifiant, quantité) ; la quantité est exprimée
+dans l'unité du facteur ('Unité français') et déjà ramenée à l'année.
+Chaque morceau de lignes est joint à la table des facteurs par table de hachage (pandas.Index.get_indexer)
+puis sommé par répondant et par categorie : le temps reste linéaire en nombre de lignes et la mémoire bornée par un morceau.
+
+    -IdentifierIndex : Table des facteurs indexée par identifiant
+    -get_identifier_index : Retourne l'index attaché à la base, le construit si besoin
+    -score_purchases : Retourne les émissions par répondant et par categorie d'un tableau (ou d'un CSV) au format long
+'''
+
+import numpy as np
+import pandas as pd
+from . import data
+
+RESPONDENT = 'respondent'
+IDENTIFIER = 'Identifiant de l\'élément'
+QUANTITY = 'quantity'
+CHUNKSIZE = 1000000
+
+class IdentifierIndex:
+    '''
+    Facteurs et categories de la base indexés par identifiant (premiere ligne si un identifiant est en double)
+    La categorie d'une ligne est 'Code de la catégorie' quand la base la donne, sinon son nom de base.
+    Methode:
+    - resolve : Retourne la position dans la table de chaque identifiant (-1 si inconnu)
+    '''
+    def __init__(self, base_sample, category=None):
+        base_sample = base_sample.drop_duplicates(IDENTIFIER)
+        self.identifiers = pd.Index(base_sample[IDENTIFIER].astype('int64'))
+        self.factors = base_sample['Total poste non décomposé'].to_numpy(dtype=float)
+        if category is not None:
+            names = base_sample[category]
+        elif 'Code de la catégorie' in base_sample:
+            names = base_sample['Code de la catégorie'].astype('object').fillna(base_sample['Nom base français'])
+        else:
+            names = base_sample['Nom base français']
+        self.category_codes, categories = pd.factorize(names.astype('object'))
+        self.categories = list(categories)
+
+    def resolve(self, identifiers):
+        return self.identifiers.get_indexer(np.asarray(identifiers, dtype='int64'))
+
+def get_identifier_index(base_sample=None):
+    '''
+    Retourne l'index des identifiants de la base, construit une seule fois pour cette base (voir data.derived)
+    '''
+    if base_sample is None:
+        base_sample = data.get_base_sample()
+    return data.derived(base_sample, 'identifier_index', IdentifierIndex)
+
+def _chunks(purchases, chunksize, columns):
+    if isinstance(purchases, pd.DataFrame):
+        for start in range(0, len(purchases), chunksize):
+            yield purchases.iloc[start:start + chunksize]
+    elif isinstance(purchases, str):
+        yield from pd.read_csv(purchases, usecols=columns, chunksize=chunksize)
+    else:
+        yield from purchases
+
+def score_purchases(purchases, base_sample=None, index=None, chunksize=CHUNKSIZE,
+                    respondent=RESPONDENT, identifier=IDENTIFIER, quantity=QUANTITY):
+    '''
+    Calcule les émissions de chaque répondant par categorie à partir d'achats au format long
+
+    Arguments:
+        purchases: DataFrame, chemin d'un CSV ou itérable de DataFrame, avec les colonnes respondent, identifier et quantity
+        base_sample: Base des facteurs d'emission, par défaut data.get_base_sample()
+        index: IdentifierIndex déjà construit, prioritaire sur base_sample (par exemple avec une autre colonne de categorie)
+        chunksize: nombre de lignes joint et sommé à la fois
+
+    Retourne: (category_emissions, unmatched)
+        category_emissions: DataFrame avec une ligne par répondant, une colonne par categorie et 'total'
+        unmatched: Series du nombre de lignes de chaque identifiant absent de la base
+    '''
+    if index is None:
+        index = get_identifier_index(base_sample)
+    partials = []
+    unmatched = []
+    for chunk in _chunks(purchases, chunksize, [respondent, identifier, quantity]):
+        positions = index.resolve(chunk[identifier].to_numpy())
+        found = positions >= 0
+        if not found.all():
+            unmatched.append(chunk[identifier].to_numpy()[~found])
+        positions = positions[found]
+        emissions = chunk[quantity].to_numpy(dtype=float)[found] * index.factors[positions]
+        partial = pd.DataFrame({'respondent': chunk[respondent].to_numpy()[found],
+                                'category': index.category_codes[positions], 'emissions': emissions})
+        # Somme groupée par table de hachage, sans tri
+        partials.append(partial.groupby(['respondent', 'category'], sort=False)['emissions'].sum())
+
+    if partials:
+        # Un répondant peut être réparti sur plusieurs morceaux : les sommes partielles sont ajoutées
+        totals = pd.concat(partials).groupby(level=[0, 1], sort=False).sum()
+        category_emissions = totals.unstack('category', fill_value=0.0)
+    else:
+        category_emissions = pd.DataFrame(dtype=float)
+    category_emissions.columns = [index.categories[code] for code in category_emissions.columns]
+    category_emissions.index.name = respondent
+    category_emissions['total'] = category_emissions.sum(axis=1)
+    unmatched = pd.Series(np.concatenate(unmatched) if unmatched else np.array([], dtype='int64')).value_counts()
+    unmatched.index.name = identifier
+    return category_emissions, unmatched
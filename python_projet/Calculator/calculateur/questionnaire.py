@@ -0,0 +1,346 @@
+'''
+Questionnaire du calculateur décrit sous forme de données et compilé en plan d'évaluation
+Chaque question donne sa sous categorie, son nom de base et son attribut dans la base carbone,
+sa conversion en annuel (52 pour une réponse par semaine) et sa grande categorie.
+
+Le plan compilé contient, pour chaque sous categorie trouvée dans la base, le facteur d'emission
+multiplié par la conversion en annuel et l'indice de sa grande categorie. Les modes interactif,
+fichier et service calculent tous les émissions par un même produit avec ces tableaux.
+
+    -QUESTIONNAIRE : liste des questions
+    -EvaluationPlan : Plan d'évaluation compilé à partir du questionnaire et de l'index des facteurs
+    -get_plan : Retourne le plan compilé une seule fois pour une base
+    -save_plan : Enregistre un plan compilé dans un fichier .npz
+    -load_plan : Relit un plan compilé sans pandas
+    -get_compiled_plan : Retourne le plan depuis le fichier compilé, le recompile si les sources ont changé
+    -write_resource : Écrit le plan dans le fichier binaire livré avec le paquet (RESOURCE)
+    -load_resource : Relit ce fichier par importlib.resources et mmap, sans lire de CSV
+
+Ce module n'importe pas pandas : avec get_compiled_plan, answer_vector et evaluate un calcul se fait
+avec NumPy seul. pandas n'est chargé (par data) que pour compiler le plan à partir des CSV.
+'''
+
+import os
+import mmap
+import json
+import struct
+import hashlib
+import pathlib
+import importlib.resources
+import numpy as np
+from . import utils
+from . import instrumentation
+
+CATEGORIES = ["transport", "energie", "alimentation"]
+PLAN_PATH = 'questionnaire_plan.npz'
+# Facteurs compilés livrés avec le paquet (construits par build_resource.py)
+RESOURCE = 'questionnaire_factors.bin'
+RESOURCE_MAGIC = b'CALCFAC1'
+# Tableaux du fichier binaire : facteurs en float64 et indices de grande categorie (codes) en int64
+RESOURCE_ARRAYS = [('factors', '<f8'), ('multipliers', '<f8'), ('uncertainties', '<f8'), ('category_index', '<i8')]
+
+# Une question à choix ('choices') donne une sous categorie par réponse possible, la quantité est demandée ensuite
+QUESTIONNAIRE = [
+    {"sub_category": "avion", "category": "transport", "base": "avion", "multiplier": 1,
+     "question": "Combien de km parcourez-vous par an en avion ?\n"},
+    {"sub_category": "TGV", "category": "transport", "base": "TGV", "multiplier": 1,
+     "question": "Combien de km parcourez-vous par an en TGV ?\n"},
+    {"sub_category": "motorisation", "category": "transport", "multiplier": 52,
+     "question": "Quelle motorisation avez-vous (écrire : électrique ou essence) ?\n",
+     "quantity": "motorisation_km",
+     "quantity_question": "Combien de km parcourez-vous en voiture chaque semaine ?\n",
+     "choices": {
+         "électrique": {"sub_category": "voiture_électrique", "base": "Voiture", "attribute": "électrique"},
+         "essence": {"sub_category": "voiture_essence", "base": "Voiture particulière", "attribute": "essence"},
+     }},
+    {"sub_category": "Métro", "category": "transport", "base": "Métro", "multiplier": 52,
+     "question": "Combien de km par semaine prenez-vous le métro ?\n"},
+    {"sub_category": "RER", "category": "transport", "base": "RER", "multiplier": 52,
+     "question": "Combien de km par semaine prenez-vous le RER ?\n"},
+    {"sub_category": "Bus", "category": "transport", "base": "Bus", "multiplier": 52,
+     "question": "Combien de km par semaine prenez-vous le bus?\n"},
+    {"sub_category": "Gaz", "category": "energie", "base": "Gaz", "multiplier": 1,
+     "question": "Quantité annuelle de Gaz consommé chez vous ?\n"},
+    {"sub_category": "Electricité", "category": "energie", "base": "Electricité", "multiplier": 1,
+     "question": "Quantité annuelle d'électricité consommée chez vous ?\n"},
+    {"sub_category": "Repas", "category": "alimentation", "base": "Repas", "multiplier": 52,
+     "question": "Combien de repas végétariens par semaine ?\n"},
+    {"sub_category": "viande", "category": "alimentation", "base": "viande", "multiplier": 52,
+     "question": "Combien de repas avec de la viande bovine par semaine ?\n"},
+]
+
+# Réponses numériques attendues (une colonne par réponse dans un fichier d'enquête)
+NUMERIC_INPUTS = [question.get("quantity", question["sub_category"]) for question in QUESTIONNAIRE]
+# Réponses à choix -> réponses possibles
+CHOICE_INPUTS = {question["sub_category"]: list(question["choices"]) for question in QUESTIONNAIRE if "choices" in question}
+
+class EvaluationPlan:
+    '''
+    Plan d'évaluation compilé : une entrée par sous categorie dont le facteur est dans la base.
+    Attributs:
+    - sub_categories : noms des sous categories
+    - factors : facteurs d'emission (float64)
+    - multipliers : conversions en annuel (float64)
+    - weights : factors * multipliers
+    - uncertainties : incertitudes relatives des facteurs (NaN si la base ne les donne pas)
+    - category_index : indice de la grande categorie de chaque entrée dans CATEGORIES
+    - membership : matrice (entrées, categories) de 0 et 1
+    - missing : sous categories sans facteur dans la base
+    Methodes:
+    - answer_vector : Retourne le vecteur de réponses d'un utilisateur (dictionnaire)
+    - answer_matrix : Retourne la matrice de réponses d'un fichier d'enquête (DataFrame)
+    - evaluate : Retourne les émissions par sous categorie et par grande categorie
+    - to_dicts : Retourne les émissions d'un utilisateur sous forme de dictionnaires
+    '''
+    def __init__(self, factor_index, questionnaire=QUESTIONNAIRE, categories=CATEGORIES):
+        self.categories = list(categories)
+        self.sub_categories = []
+        self.inputs = []  # (colonne de la quantité, colonne du choix, choix normalisé) par entrée
+        self.missing = []
+        factors, multipliers, category_index, uncertainties = [], [], [], []
+        with instrumentation.stage('factor_resolution') as timing:
+            self._resolve(factor_index, questionnaire, factors, multipliers, category_index, uncertainties)
+            timing.rows = len(self.sub_categories) + len(self.missing)
+        self._set_arrays(factors, multipliers, uncertainties, category_index)
+
+    def _resolve(self, factor_index, questionnaire, factors, multipliers, category_index, uncertainties):
+        # Recherche du facteur de chaque sous categorie dans l'index
+        for question in questionnaire:
+            if "choices" in question:
+                entries = [(choice["sub_category"], choice["base"], choice.get("attribute"),
+                            (question["quantity"], question["sub_category"], utils.normalize(answer)))
+                           for answer, choice in question["choices"].items()]
+            else:
+                entries = [(question["sub_category"], question["base"], question.get("attribute"),
+                            (question["sub_category"], None, None))]
+            for sub_category, base, attribute, inputs in entries:
+                emission_factor = factor_index.lookup(base, attribute)
+                if emission_factor is None:
+                    self.missing.append(sub_category)
+                    continue
+                self.sub_categories.append(sub_category)
+                self.inputs.append(inputs)
+                factors.append(emission_factor)
+                uncertainties.append(factor_index.lookup_uncertainty(base, attribute))
+                multipliers.append(question["multiplier"])
+                category_index.append(self.categories.index(question["category"]))
+
+    def _set_arrays(self, factors, multipliers, uncertainties, category_index):
+        # asarray : les tableaux lus par mmap (load_resource) ne sont pas recopiés
+        self.factors = np.asarray(factors, dtype=float)
+        self.multipliers = np.asarray(multipliers, dtype=float)
+        self.weights = self.factors * self.multipliers
+        self.uncertainties = np.asarray(uncertainties, dtype=float)
+        self.category_index = np.asarray(category_index, dtype=np.int64)
+        self.membership = np.zeros((len(self.sub_categories), len(self.categories)))
+        self.membership[np.arange(len(self.sub_categories)), self.category_index] = 1.0
+
+    def answer_vector(self, answers):
+        '''
+        Vecteur des réponses d'un utilisateur, sans pandas. Les réponses absentes valent 0.
+
+        Arguments:
+            answers: dictionnaire {colonne: réponse}, par exemple {"avion": 1000, "motorisation": "essence", "motorisation_km": 100}
+        '''
+        vector = np.zeros(len(self.sub_categories))
+        for j, (column, choice_column, choice) in enumerate(self.inputs):
+            if choice is None or utils.normalize(answers.get(choice_column)) == choice:
+                vector[j] = answers.get(column, 0.0)
+        return vector
+
+    def answer_matrix(self, responses):
+        '''
+        Matrice des réponses d'un fichier d'enquête, une ligne par répondant
+
+        Arguments:
+            responses: DataFrame avec une colonne par réponse de NUMERIC_INPUTS et CHOICE_INPUTS.
+                       Sans colonne de choix, les entrées de ce choix valent 0.
+        '''
+        matrix = np.zeros((len(responses), len(self.sub_categories)))
+        choices = {}
+        for j, (column, choice_column, choice) in enumerate(self.inputs):
+            if choice is None:
+                matrix[:, j] = responses[column].to_numpy(dtype=float)
+            elif choice_column in responses:
+                if choice_column not in choices:
+                    choices[choice_column] = responses[choice_column].map(utils.normalize).to_numpy()
+                matrix[:, j] = np.where(choices[choice_column] == choice, responses[column].to_numpy(dtype=float), 0.0)
+        return matrix
+
+    def evaluate(self, answers):
+        '''
+        Calcule les émissions d'un vecteur (d'une matrice) de réponses
+
+        Retourne: (émissions par sous categorie, émissions par grande categorie)
+        '''
+        with instrumentation.stage('roll_up', rows=len(answers) if np.ndim(answers) == 2 else 1):
+            detailed = answers * self.weights
+            return detailed, detailed @ self.membership
+
+    def to_dicts(self, detailed, category_totals, answers=None):
+        '''
+        Retourne (detailed_emissions, category_emissions) sous forme de dictionnaires.
+        Si answers est donné, seules les sous categories des choix faits par l'utilisateur sont gardées.
+        '''
+        detailed_emissions = {}
+        for sub_category, (column, choice_column, choice), emissions in zip(self.sub_categories, self.inputs, detailed):
+            if answers is None or choice is None or utils.normalize(answers.get(choice_column)) == choice:
+                detailed_emissions[sub_category] = float(emissions)
+        category_emissions = dict(zip(self.categories, map(float, category_totals)))
+        return detailed_emissions, category_emissions
+
+def get_plan(base_sample=None):
+    '''
+    Retourne le plan d'évaluation de la base, compilé une seule fois pour cette base (voir data.derived) :
+    une copie modifiée de la base compile son propre plan.
+    Sans base, et si les fichiers sources ne sont pas dans le dossier courant, le plan est celui de get_compiled_plan
+    (fichier RESOURCE du paquet)
+    '''
+    if base_sample is None and not (os.path.exists('basecarbone_sample.csv') and os.path.exists('basecarbone-v17-fr.csv')):
+        return get_compiled_plan()
+    from . import data  # pandas n'est importé que pour compiler le plan à partir de la base
+    if base_sample is None:
+        base_sample = data.get_base_sample()
+    return data.derived(base_sample, 'evaluation_plan', lambda base: EvaluationPlan(data.get_factor_index(base)))
+
+def questionnaire_fingerprint(source_fingerprint):
+    '''
+    Empreinte d'un plan : fichiers sources et définition du questionnaire (un changement de QUESTIONNAIRE recompile le plan)
+    '''
+    return json.dumps([source_fingerprint, _definition_hash()])
+
+def _definition_hash():
+    return hashlib.sha256(json.dumps([QUESTIONNAIRE, CATEGORIES], sort_keys=True).encode('utf-8')).hexdigest()
+
+def save_plan(plan, path, source_fingerprint):
+    '''
+    Enregistre les tableaux du plan dans un fichier .npz avec l'empreinte des fichiers sources
+    '''
+    inputs = [[value if value is not None else '' for value in entry] for entry in plan.inputs]
+    temporary_path = f'{path}.{os.getpid()}.tmp.npz'
+    try:
+        np.savez(temporary_path, fingerprint=np.array(questionnaire_fingerprint(source_fingerprint)),
+                 categories=np.array(plan.categories), sub_categories=np.array(plan.sub_categories, dtype=str),
+                 inputs=np.array(inputs, dtype=str).reshape(len(inputs), 3), missing=np.array(plan.missing, dtype=str),
+                 factors=plan.factors, multipliers=plan.multipliers, uncertainties=plan.uncertainties,
+                 category_index=plan.category_index)
+        os.replace(temporary_path, path)
+    except OSError:
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+
+def load_plan(path=PLAN_PATH, source_fingerprint=None):
+    '''
+    Relit un plan enregistré par save_plan, avec NumPy seul
+
+    Retourne: EvaluationPlan, ou None si le fichier est absent, illisible ou ne correspond pas à source_fingerprint
+    '''
+    try:
+        with np.load(path, allow_pickle=False) as arrays:
+            if source_fingerprint is not None and str(arrays['fingerprint']) != questionnaire_fingerprint(source_fingerprint):
+                return None
+            plan = EvaluationPlan.__new__(EvaluationPlan)
+            plan.categories = arrays['categories'].tolist()
+            plan.sub_categories = arrays['sub_categories'].tolist()
+            plan.inputs = [tuple(value if value != '' else None for value in entry) for entry in arrays['inputs'].tolist()]
+            plan.missing = arrays['missing'].tolist()
+            plan._set_arrays(arrays['factors'], arrays['multipliers'], arrays['uncertainties'], arrays['category_index'])
+    except (OSError, ValueError, KeyError):
+        return None
+    return plan
+
+def get_compiled_plan(path=PLAN_PATH, sample_path='basecarbone_sample.csv', full_path='basecarbone-v17-fr.csv'):
+    '''
+    Retourne le plan depuis le fichier compilé path sans importer pandas tant que les fichiers sources n'ont pas changé.
+    Sinon le plan est compilé à partir de la base (data.get_base_sample) et le fichier est réécrit.
+    Si les fichiers sources ne sont pas dans le dossier courant, le plan est lu dans le fichier RESOURCE du paquet.
+    '''
+    if not (os.path.exists(sample_path) and os.path.exists(full_path)):
+        # Paquet installé sans les CSV : facteurs compilés livrés avec le paquet
+        with instrumentation.stage('load_resource', rows=1):
+            plan = load_resource()
+        if plan is None:
+            raise FileNotFoundError(f"Ni {sample_path} et {full_path}, ni le fichier {RESOURCE} du paquet ne sont disponibles "
+                                    "(python -m calculateur.build_resource pour le construire)")
+        return plan
+    current = utils.fingerprint(sample_path, full_path)
+    with instrumentation.stage('load_plan', rows=1):
+        plan = load_plan(path, current)
+    if plan is None:
+        from . import data
+        plan = get_plan(data.get_base_sample(sample_path, full_path))
+        save_plan(plan, path, current)
+    return plan
+
+def write_resource(plan, path, sources=None):
+    '''
+    Écrit le plan dans un fichier binaire lisible par mmap :
+    RESOURCE_MAGIC, longueur de l'entête (uint64), entête JSON (sous categories, entrées, categories, position des tableaux),
+    puis les tableaux de RESOURCE_ARRAYS, chacun aligné sur 8 octets.
+
+    Arguments:
+        sources: description des fichiers sources (par exemple leur sha256), gardée dans l'entête
+    '''
+    arrays = [np.ascontiguousarray(getattr(plan, name), dtype=dtype) for name, dtype in RESOURCE_ARRAYS]
+    # Positions relatives au début des tableaux
+    offsets = np.cumsum([0] + [array.nbytes for array in arrays[:-1]]).tolist()
+    header = json.dumps({'definition': _definition_hash(), 'sources': sources, 'categories': plan.categories,
+                         'sub_categories': plan.sub_categories, 'inputs': [list(entry) for entry in plan.inputs],
+                         'missing': plan.missing,
+                         'arrays': [[name, dtype, len(array), offset]
+                                    for (name, dtype), array, offset in zip(RESOURCE_ARRAYS, arrays, offsets)]}).encode('utf-8')
+    start = len(RESOURCE_MAGIC) + 8 + len(header)
+    temporary_path = f'{path}.{os.getpid()}.tmp'
+    try:
+        with open(temporary_path, 'wb') as file:
+            file.write(RESOURCE_MAGIC + struct.pack('<Q', len(header)) + header + b'\0' * (_aligned(start) - start))
+            for array in arrays:
+                file.write(array.tobytes())
+        os.replace(temporary_path, path)
+    except BaseException:
+        # Comme save_plan : pas de fichier temporaire laissé derrière, mais l'erreur est remontée au script de construction
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+        raise
+
+def _aligned(position):
+    return -(-position // 8) * 8
+
+def _resource_file():
+    # Donnée du paquet (setup.cfg, [options.package_data]), dans le dossier calculateur ou dans le paquet installé
+    return importlib.resources.files(__package__).joinpath(RESOURCE)
+
+def load_resource(resource=None):
+    '''
+    Relit le plan écrit par write_resource sans lire de CSV : le fichier est projeté en mémoire (mmap)
+    et les tableaux sont des vues en lecture seule sur cette projection.
+
+    Arguments:
+        resource: chemin ou importlib.resources.abc.Traversable, par défaut le fichier RESOURCE du paquet
+
+    Retourne: EvaluationPlan, ou None si le fichier est absent, invalide ou compilé pour un autre questionnaire
+    '''
+    resource = resource if resource is not None else _resource_file()
+    try:
+        with importlib.resources.as_file(pathlib.Path(resource) if isinstance(resource, str) else resource) as path:
+            with open(path, 'rb') as file:
+                buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        if buffer[:len(RESOURCE_MAGIC)] != RESOURCE_MAGIC:
+            return None
+        (length,) = struct.unpack_from('<Q', buffer, len(RESOURCE_MAGIC))
+        start = len(RESOURCE_MAGIC) + 8
+        header = json.loads(bytes(buffer[start:start + length]).decode('utf-8'))
+        if header['definition'] != _definition_hash():
+            return None
+        base = _aligned(start + length)
+        arrays = {name: np.frombuffer(buffer, dtype=dtype, count=count, offset=base + offset)
+                  for name, dtype, count, offset in header['arrays']}
+    except (OSError, ValueError, KeyError, struct.error):
+        return None
+    plan = EvaluationPlan.__new__(EvaluationPlan)
+    plan.categories = header['categories']
+    plan.sub_categories = header['sub_categories']
+    plan.inputs = [tuple(entry) for entry in header['inputs']]
+    plan.missing = header['missing']
+    plan._set_arrays(arrays['factors'], arrays['multipliers'], arrays['uncertainties'], arrays['category_index'])
+    return plan
@@ -0,0 +1,94 @@
+'''
+Rendu sans interface graphique des barplots d'empreinte carbone pour un grand nombre d'utilisateurs
+La figure Agg est créée une seule fois : pour chaque utilisateur seules les hauteurs des barres,
+les étiquettes et l'axe des ordonnées sont mis à jour avant l'enregistrement.
+
+    -EmissionChart : Figure réutilisable, enregistre un barplot dans un fichier ou en mémoire (PNG)
+    -render_reports : Retourne les barplots d'une liste d'utilisateurs, rendus sur plusieurs processus
+'''
+
+import io
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from matplotlib import colormaps
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+class EmissionChart:
+    '''
+    Barplot des émissions par catégorie (même mise en forme que calculator.visualize_emissions) sur une figure Agg réutilisée.
+    Methode:
+    - render : Met à jour la figure avec les émissions d'un utilisateur et l'enregistre
+    '''
+    def __init__(self, figsize=(12, 8), dpi=100):
+        self.figure = Figure(figsize=figsize, dpi=dpi)
+        FigureCanvasAgg(self.figure)
+        self.ax = self.figure.add_subplot()
+        self.categories = None
+        self.bars = None
+        self.labels = None
+
+    def _layout(self, categories):
+        # Construit les barres une seule fois pour une liste de categories
+        self.ax.clear()
+        colors = colormaps['viridis'](np.linspace(0, 1, len(categories)))
+        self.bars = self.ax.bar(range(len(categories)), np.zeros(len(categories)), color=colors)
+        self.labels = [self.ax.text(i, 0, '', ha='center') for i in range(len(categories))]
+        self.ax.set_xticks(range(len(categories)), categories, rotation=45)
+        self.ax.set_xlabel('Catégories')
+        self.ax.set_ylabel('Émissions (kg de CO2)')
+        self.ax.set_title('Bilan des émissions annuelles par catégorie')
+        self.figure.tight_layout()
+        self.categories = categories
+
+    def render(self, detailed_emissions, output=None, format='png'):
+        '''
+        Met à jour les barres et les étiquettes puis enregistre la figure
+
+        Arguments:
+            detailed_emissions: dictionnaire {categorie: émissions}
+            output: chemin ou fichier ouvert en écriture binaire, None pour retourner l'image en mémoire
+
+        Retourne: output, ou les octets de l'image si output est None
+        '''
+        categories = list(detailed_emissions.keys())
+        emissions = list(detailed_emissions.values())
+        if categories != self.categories:
+            self._layout(categories)
+        for bar, label, value in zip(self.bars, self.labels, emissions):
+            bar.set_height(value)
+            label.set_position((label.get_position()[0], value + 0.05))
+            label.set_text(f'{value:.2f}')
+        top = max(emissions, default=0)
+        self.ax.set_ylim(min(0, min(emissions, default=0)), top * 1.1 if top > 0 else 1)
+        if output is None:
+            buffer = io.BytesIO()
+            self.figure.savefig(buffer, format=format)
+            return buffer.getvalue()
+        self.figure.savefig(output, format=format)
+        return output
+
+# Figure propre à chaque processus de render_reports
+_chart = None
+
+def _render(item):
+    global _chart
+    if _chart is None:
+        _chart = EmissionChart()
+    detailed_emissions, output = item
+    return _chart.render(detailed_emissions, output)
+
+def render_reports(reports, workers=None, chunksize=32):
+    '''
+    Rend les barplots d'une liste d'utilisateurs sur plusieurs processus, chaque processus réutilise sa figure
+
+    Arguments:
+        reports: liste de (detailed_emissions, chemin ou None)
+        workers: Nombre de processus, par défaut le nombre de coeurs (1 pour rester dans le processus courant)
+
+    Retourne: liste des chemins, ou des images PNG en octets pour les chemins à None, dans l'ordre de reports
+    '''
+    if workers == 1:
+        return [_render(item) for item in reports]
+    with ProcessPoolExecutor(workers) as executor:
+        return list(executor.map(_render, reports, chunksize=chunksize))
@@ -0,0 +1,65 @@
+'''
+Tableaux « et si » : empreinte d'un utilisateur pour toutes les combinaisons de modifications de ses réponses
+Une grille donne, pour chaque réponse modifiée, la liste des options testées :
+    -réponse numérique : coefficients appliqués à la réponse de départ (0.5 pour diviser par deux)
+    -réponse à choix : réponses de remplacement (motorisation 'essence' -> 'électrique')
+Toutes les combinaisons (produit cartésien) sont évaluées en une fois par broadcasting NumPy :
+chaque entrée du plan ne dépend que de sa quantité et de son choix, seules ces dimensions de la grille sont parcourues.
+
+    -evaluate_grid : Retourne un DataFrame des scénarios trié par réduction d'émissions décroissante
+'''
+
+import numpy as np
+import pandas as pd
+from . import data
+from . import questionnaire
+
+def evaluate_grid(base_answers, grid, base_sample=None):
+    '''
+    Évalue toutes les combinaisons de la grille à partir des réponses de départ
+
+    Arguments:
+        base_answers: dictionnaire des réponses de départ, par exemple {"avion": 1000, "motorisation": "essence", "motorisation_km": 100}
+        grid: dictionnaire {réponse: options}, par exemple {"motorisation_km": [1, 0.5], "motorisation": ["essence", "électrique"]}
+
+    Retourne: DataFrame avec une ligne par scénario : option de chaque réponse, émissions par grande categorie,
+              'total' et 'reduction' (émissions de départ - total), trié par réduction décroissante
+    '''
+    plan = questionnaire.get_plan(base_sample)
+    for column in grid:
+        if column not in questionnaire.NUMERIC_INPUTS and column not in questionnaire.CHOICE_INPUTS:
+            raise ValueError(f"Réponse inconnue dans la grille : {column}")
+    dimensions = list(grid)
+    shape = tuple(len(grid[column]) for column in dimensions)
+
+    def along(column, values):
+        # Place les options de la réponse sur son axe de la grille
+        axes = [1] * len(shape)
+        axes[dimensions.index(column)] = len(values)
+        return np.asarray(values).reshape(axes)
+
+    category_totals = np.zeros((len(plan.categories),) + shape)
+    for j, (column, choice_column, choice) in enumerate(plan.inputs):
+        quantity = float(base_answers.get(column, 0.0))
+        if column in grid:
+            quantity = quantity * along(column, np.asarray(grid[column], dtype=float))
+        if choice is not None:
+            if choice_column in grid:
+                selected = along(choice_column, [data.normalize(option) == choice for option in grid[choice_column]])
+            else:
+                selected = data.normalize(base_answers.get(choice_column)) == choice
+            quantity = quantity * selected
+        category_totals[plan.category_index[j]] += quantity * plan.weights[j]
+
+    base_total = plan.evaluate(plan.answer_vector(base_answers))[0].sum()
+    totals = category_totals.sum(axis=0).ravel()
+    reduction = base_total - totals
+    order = np.argsort(-reduction, kind='stable')
+
+    indices = np.unravel_index(order, shape)
+    result = {column: np.asarray(grid[column])[index] for column, index in zip(dimensions, indices)}
+    for category, values in zip(plan.categories, category_totals.reshape(len(plan.categories), -1)):
+        result[category] = values[order]
+    result['total'] = totals[order]
+    result['reduction'] = reduction[order]
+    return pd.DataFrame(result)
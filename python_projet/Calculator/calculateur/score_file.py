@@ -0,0 +1,115 @@
+'''
+Calcul de l'empreinte carbone d'un très gros fichier d'enquête (CSV) sur plusieurs processus
+Le fichier est découpé en morceaux d'octets alignés sur les fins de ligne, chaque morceau est calculé
+par calculator.calculate_batch dans un processus de ProcessPoolExecutor qui charge la base une seule fois.
+Les résultats des morceaux sont recopiés dans l'ordre dans un seul fichier de sortie.
+
+Les réponses ne doivent pas contenir de retour à la ligne entre guillemets.
+
+Execution : python -m calculateur.score_file reponses.csv resultats.csv --workers 8
+'''
+
+import argparse
+import io
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+from . import data
+from . import calculator
+from . import aggregate
+from . import questionnaire
+
+SHARD_SIZE = 64 * 1024 * 1024  # 64 Mo par morceau
+
+def split_shards(input_path, shard_size=SHARD_SIZE):
+    '''
+    Découpe le fichier en morceaux d'environ shard_size octets qui commencent et finissent sur une fin de ligne
+
+    Retourne: (entête, liste des (début, fin) en octets)
+    '''
+    with open(input_path, 'rb') as f:
+        header = f.readline()
+        start = f.tell()
+        size = os.fstat(f.fileno()).st_size
+        shards = []
+        while start < size:
+            f.seek(min(start + shard_size, size))
+            f.readline()
+            end = min(f.tell(), size)
+            shards.append((start, end))
+            start = end
+    return header, shards
+
+def _load_factors(sample_path, full_path):
+    # Initialisation de chaque processus : la base est lue (ou relue depuis le fichier binaire) une seule fois
+    data.get_base_sample(sample_path, full_path)
+
+def _score_shard(input_path, header, start, end, part_path, sample_path, full_path, relative_accuracy):
+    with open(input_path, 'rb') as f:
+        f.seek(start)
+        content = header + f.read(end - start)
+    responses = pd.read_csv(io.BytesIO(content))
+    detailed_emissions, category_emissions = calculator.calculate_batch(responses, data.get_base_sample(sample_path, full_path))
+    result = pd.concat([detailed_emissions, category_emissions], axis=1)
+    result.to_csv(part_path, index=False, header=False)
+    aggregator = aggregate.PopulationAggregator(relative_accuracy)
+    aggregator.update(detailed_emissions, category_emissions)
+    return category_emissions.sum().to_dict(), len(result), aggregator
+
+def score_file(input_path, output_path, workers=None, shard_size=SHARD_SIZE,
+               sample_path=data.SAMPLE_PATH, full_path=data.FULL_PATH, aggregator=None):
+    '''
+    Calcule l'empreinte carbone de chaque ligne de input_path et l'écrit dans output_path
+    (émissions par sous categorie puis par grande categorie, une ligne par répondant dans le même ordre).
+
+    Arguments:
+        workers: Nombre de processus, par défaut le nombre de coeurs
+        shard_size: Taille approximative en octets d'un morceau
+        aggregator: aggregate.PopulationAggregator complété avec les agrégats de chaque morceau
+
+    Retourne: (nombre de répondants, totaux des émissions par grande categorie)
+    '''
+    sample_path, full_path = os.path.abspath(sample_path), os.path.abspath(full_path)
+    header, shards = split_shards(input_path, shard_size)
+    relative_accuracy = aggregator.relative_accuracy if aggregator is not None else 0.01
+    totals = {category: 0.0 for category in questionnaire.CATEGORIES}
+    count = 0
+    # Entête écrit depuis le plan, même pour un fichier sans répondant
+    plan = questionnaire.get_plan(data.get_base_sample(sample_path, full_path))
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(output_path))) as parts_dir, \
+            ProcessPoolExecutor(workers, initializer=_load_factors, initargs=(sample_path, full_path)) as executor:
+        part_paths = [os.path.join(parts_dir, f'part_{i}.csv') for i in range(len(shards))]
+        futures = [executor.submit(_score_shard, input_path, header, start, end, part_path, sample_path, full_path, relative_accuracy)
+                   for (start, end), part_path in zip(shards, part_paths)]
+        with open(output_path, 'w', encoding='utf-8', newline='') as output:
+            output.write(','.join(plan.sub_categories + plan.categories) + '\n')
+            for future, part_path in zip(futures, part_paths):
+                shard_totals, shard_count, shard_aggregator = future.result()
+                with open(part_path, encoding='utf-8', newline='') as part:
+                    shutil.copyfileobj(part, output)
+                os.remove(part_path)
+                for category, emissions in shard_totals.items():
+                    totals[category] += emissions
+                count += shard_count
+                if aggregator is not None:
+                    aggregator.merge(shard_aggregator)
+    return count, totals
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Calcul de l'empreinte carbone d'un fichier d'enquête sur plusieurs processus")
+    parser.add_argument('input_path')
+    parser.add_argument('output_path')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--shard-size', type=int, default=SHARD_SIZE // (1024 * 1024), help="Taille d'un morceau en Mo")
+    arguments = parser.parse_args()
+    aggregator = aggregate.PopulationAggregator()
+    count, totals = score_file(arguments.input_path, arguments.output_path, arguments.workers,
+                               arguments.shard_size * 1024 * 1024, aggregator=aggregator)
+    print(f"{count} répondants calculés")
+    print("\nTotal des émissions annuelles par grande catégorie:")
+    for category, emissions in totals.items():
+        print(f"{category}: {emissions:.2f} kg de CO2")
+    print("\nDistribution des émissions par grande catégorie:")
+    print(aggregator.summary(level='category'))
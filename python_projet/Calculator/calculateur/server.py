@@ -0,0 +1,205 @@
+'''
+Service HTTP local du calculateur d'empreinte carbone
+Les réponses au questionnaire sont envoyées en JSON, les requêtes simultanées sont regroupées
+en petits lots calculés en une seule passe NumPy avec le plan d'évaluation du questionnaire.
+
+Routes :
+    -POST /footprint : corps JSON {"avion": 1000, "TGV": 500, ..., "motorisation": "essence", "motorisation_km": 100}
+                       Retourne {"detailed_emissions": {...}, "category_emissions": {...}}
+    -GET /stats : Retourne les statistiques de population (aggregate.PopulationAggregator) des réponses calculées
+    -GET /health : Retourne {"status": "ok"}
+
+Execution : python -m calculateur.server --port 8000
+'''
+
+import argparse
+import asyncio
+import json
+import math
+import numpy as np
+from . import data
+from . import questionnaire
+from . import aggregate
+
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 500: 'Internal Server Error'}
+
+class FootprintServer:
+    '''
+    Serveur HTTP asyncio sur une socket locale.
+    La base des facteurs est chargée une seule fois au démarrage.
+    Methodes:
+    - start : Charge la base, ouvre la socket et lance le regroupement des requêtes
+    - close : Ferme la socket et arrête le regroupement
+    - score : Retourne (detailed_emissions, category_emissions) pour les réponses d'un utilisateur
+    '''
+    def __init__(self, host='127.0.0.1', port=8000, max_batch=256, max_delay=0.002, aggregator=None):
+        self.host = host
+        self.port = port
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._server = None
+        self._queue = None
+        self._batcher = None
+        self.aggregator = aggregator if aggregator is not None else aggregate.PopulationAggregator()
+
+    async def start(self):
+        questionnaire.get_plan()
+        self._queue = asyncio.Queue()
+        self._batcher = asyncio.create_task(self._run_batches())
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        # port=0 : le systeme choisit un port libre
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        self._server.close()
+        await self._server.wait_closed()
+        self._batcher.cancel()
+
+    async def serve_forever(self):
+        await self.start()
+        print(f"Calculateur disponible sur http://{self.host}:{self.port}/footprint")
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def score(self, answers):
+        '''
+        Ajoute les réponses au prochain lot et attend son résultat
+        '''
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((answers, future))
+        return await future
+
+    async def _run_batches(self):
+        while True:
+            batch = [await self._queue.get()]
+            # Laisse aux requêtes simultanées le temps d'arriver dans le même lot
+            await asyncio.sleep(self.max_delay)
+            while len(batch) < self.max_batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            try:
+                results = score_answers([answers for answers, future in batch])
+            except Exception as error:
+                for answers, future in batch:
+                    if not future.done():
+                        future.set_exception(error)
+                continue
+            for (answers, future), result in zip(batch, results):
+                # Une ligne en erreur ne concerne que sa requête : le regroupement continue pour les autres
+                try:
+                    if not all(math.isfinite(value) for emissions in result for value in emissions.values()):
+                        raise ValueError("Émissions non finies : réponses trop grandes")
+                    self.aggregator.update_one(*result)
+                except Exception as error:
+                    if not future.done():
+                        future.set_exception(error)
+                    continue
+                if not future.done():
+                    future.set_result(result)
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, version = request_line.decode('latin-1').split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get('content-length', 0)))
+
+                try:
+                    status, payload = await self._route(method, path, body)
+                except Exception as error:
+                    # Erreur du calcul : le client reçoit une réponse au lieu d'une connexion fermée
+                    status, payload = 500, {'error': f"Erreur interne : {error}"}
+                try:
+                    content = json.dumps(payload, ensure_ascii=False, allow_nan=False).encode('utf-8')
+                except ValueError:
+                    # NaN ou Infinity ne sont pas du JSON valide
+                    status = 500
+                    content = json.dumps({'error': "Résultat non fini"}).encode('utf-8')
+                keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+                writer.write(
+                    f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                    "Content-Type: application/json; charset=utf-8\r\n"
+                    f"Content-Length: {len(content)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode('latin-1') + content)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ValueError, asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def _route(self, method, path, body):
+        if path == '/health':
+            return 200, {'status': 'ok'}
+        if path == '/stats':
+            return 200, {'detailed_emissions': self.aggregator.summary().to_dict('index'),
+                         'category_emissions': self.aggregator.summary(level='category').to_dict('index')}
+        if path != '/footprint':
+            return 404, {'error': f"Route inconnue : {path}"}
+        if method != 'POST':
+            return 405, {'error': "Utiliser POST"}
+        try:
+            answers = validate_answers(json.loads(body or b'{}'))
+        except ValueError as error:
+            return 400, {'error': str(error)}
+        try:
+            detailed_emissions, category_emissions = await self.score(answers)
+        except ValueError as error:
+            return 400, {'error': str(error)}
+        return 200, {'detailed_emissions': detailed_emissions, 'category_emissions': category_emissions}
+
+def validate_answers(answers):
+    '''
+    Vérifie les réponses reçues en JSON : les champs numériques absents valent 0,
+    NaN et Infinity (acceptés par json.loads) sont refusés.
+    Des réponses finies mais trop grandes (1e308) sont refusées après le calcul, quand les émissions ne sont pas finies.
+
+    Retourne: dictionnaire des réponses complété
+    '''
+    if not isinstance(answers, dict):
+        raise ValueError("Le corps de la requête doit être un objet JSON")
+    checked = {}
+    for field in questionnaire.NUMERIC_INPUTS:
+        value = answers.get(field, 0)
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise ValueError(f"'{field}' doit être un nombre")
+        if not math.isfinite(value):
+            raise ValueError(f"'{field}' doit être un nombre fini")
+        checked[field] = float(value)
+    for field, choices in questionnaire.CHOICE_INPUTS.items():
+        value = answers.get(field)
+        if value is not None and data.normalize(value) not in [data.normalize(choice) for choice in choices]:
+            raise ValueError(f"'{field}' doit être parmi : {', '.join(choices)}")
+        checked[field] = value
+    return checked
+
+def score_answers(batch):
+    '''
+    Calcule un lot de réponses en une seule passe, sans pandas
+
+    Retourne: liste de (detailed_emissions, category_emissions) sous forme de dictionnaires
+    '''
+    plan = questionnaire.get_plan()
+    # Les émissions non finies (réponses trop grandes) sont refusées ligne par ligne par _run_batches
+    with np.errstate(over='ignore', invalid='ignore'):
+        detailed, category_totals = plan.evaluate(np.array([plan.answer_vector(answers) for answers in batch]))
+    return [plan.to_dicts(row, totals, answers) for row, totals, answers in zip(detailed, category_totals, batch)]
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Service HTTP du calculateur d'empreinte carbone")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--max-batch', type=int, default=256)
+    parser.add_argument('--max-delay', type=float, default=0.002, help="Attente en secondes pour regrouper les requêtes")
+    arguments = parser.parse_args()
+    server = FootprintServer(arguments.host, arguments.port, arguments.max_batch, arguments.max_delay)
+    asyncio.run(server.serve_forever())
@@ -0,0 +1,88 @@
+'''
+Session de calcul d'un utilisateur qui modifie ses réponses une à une
+La session garde les émissions de chaque sous categorie et les totaux par grande categorie :
+modifier une réponse ne recalcule que les entrées du plan qui en dépendent (la quantité, ou les choix d'une même question)
+et corrige les totaux de la différence, sans réévaluer tout le questionnaire.
+
+    -FootprintSession : Empreinte d'un utilisateur mise à jour réponse par réponse
+'''
+
+from . import questionnaire
+from . import utils
+
+class FootprintSession:
+    '''
+    Empreinte carbone d'un utilisateur mise à jour à chaque réponse
+    Methodes:
+    - update : Modifie une réponse et met à jour les émissions qui en dépendent
+    - update_many : Modifie plusieurs réponses
+    - result : Retourne (detailed_emissions, category_emissions) comme calculator.calculate
+    - total : Retourne l'empreinte annuelle totale
+    '''
+    def __init__(self, plan=None, answers=None):
+        '''
+        Arguments:
+            plan: questionnaire.EvaluationPlan, par défaut le plan compilé (questionnaire.get_compiled_plan)
+            answers: dictionnaire des réponses de départ, comme questionnaire.EvaluationPlan.answer_vector
+        '''
+        self.plan = plan if plan is not None else questionnaire.get_compiled_plan()
+        self.answers = {}
+        # Entrées du plan qui dépendent de chaque réponse
+        self._entries = {}
+        for j, (column, choice_column, choice) in enumerate(self.plan.inputs):
+            self._entries.setdefault(column, []).append(j)
+            if choice is not None:
+                self._entries.setdefault(choice_column, []).append(j)
+        self._weights = self.plan.weights.tolist()
+        self._category_index = self.plan.category_index.tolist()
+        self._detailed = [0.0] * len(self.plan.sub_categories)
+        self._category_totals = [0.0] * len(self.plan.categories)
+        self._total = 0.0
+        self.update_many(answers or {})
+
+    def _quantity(self, j):
+        column, choice_column, choice = self.plan.inputs[j]
+        if choice is not None and utils.normalize(self.answers.get(choice_column)) != choice:
+            return 0.0
+        return float(self.answers.get(column, 0.0))
+
+    def update(self, column, value):
+        '''
+        Modifie une réponse, par exemple update("motorisation_km", 150) ou update("motorisation", "électrique")
+
+        Retourne: variation de l'empreinte totale (kg de CO2)
+        '''
+        if column in questionnaire.NUMERIC_INPUTS:
+            value = float(value)
+        elif column in questionnaire.CHOICE_INPUTS:
+            # Même vérification que server.validate_answers : un choix inconnu ne compterait aucune émission
+            choices = questionnaire.CHOICE_INPUTS[column]
+            if value is not None and utils.normalize(value) not in [utils.normalize(choice) for choice in choices]:
+                raise ValueError(f"'{column}' doit être parmi : {', '.join(choices)}")
+        else:
+            raise ValueError(f"Réponse inconnue : {column}")
+        self.answers[column] = value
+        change = 0.0
+        for j in self._entries.get(column, []):
+            emissions = self._quantity(j) * self._weights[j]
+            difference = emissions - self._detailed[j]
+            self._detailed[j] = emissions
+            self._category_totals[self._category_index[j]] += difference
+            change += difference
+        self._total += change
+        return change
+
+    def update_many(self, answers):
+        '''
+        Retourne: variation de l'empreinte totale (kg de CO2)
+        '''
+        return sum(self.update(column, value) for column, value in answers.items())
+
+    def total(self):
+        return self._total
+
+    def result(self):
+        '''
+        Retourne: (detailed_emissions, category_emissions) sous forme de dictionnaires, comme calculator.calculate
+        '''
+        return self.plan.to_dicts(self._detailed, self._category_totals, self.answers)
@@ -0,0 +1,234 @@
+'''
+Stockage optionnel des facteurs d'emission dans une base SQLite (module sqlite3), avec les versions successives de la base carbone
+Chaque ligne est valable d'une version (valid_from) jusqu'à la version qui la remplace (valid_to) :
+l'import d'une nouvelle version ne touche que les lignes ajoutées, modifiées ou supprimées.
+Les facteurs d'une version sont lus par requêtes indexées (identifiant, nom de base, attribut),
+sans charger toute la table dans pandas.
+
+    -FactorStore : Base SQLite des facteurs
+    -StoreIndex : Index d'une version, interchangeable avec data.FactorIndex pour compiler un plan
+'''
+
+import bisect
+import sqlite3
+import pandas as pd
+from . import data
+from . import questionnaire
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS versions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT UNIQUE NOT NULL
+);
+CREATE TABLE IF NOT EXISTS factors (
+    identifier INTEGER NOT NULL,
+    position REAL NOT NULL,
+    name TEXT,
+    name_key TEXT,
+    unit TEXT,
+    factor REAL,
+    attribute TEXT,
+    attribute_key TEXT,
+    uncertainty REAL,
+    valid_from INTEGER NOT NULL,
+    valid_to INTEGER
+);
+CREATE INDEX IF NOT EXISTS factors_identifier ON factors (identifier, valid_to);
+CREATE INDEX IF NOT EXISTS factors_name ON factors (name_key, position);
+CREATE INDEX IF NOT EXISTS factors_attribute ON factors (name_key, attribute_key);
+'''
+
+FIELDS = ['name', 'unit', 'factor', 'attribute', 'uncertainty']
+
+# Lignes valables dans la version ? (une ligne remplacée a valid_to égal à la version qui la remplace)
+VALID = 'valid_from <= ? AND (valid_to IS NULL OR valid_to > ?)'
+
+class FactorStore:
+    '''
+    Base SQLite des facteurs d'emission versionnés
+    Methodes:
+    - import_release : Importe une version de la base carbone en n'appliquant que les lignes qui changent
+    - versions : Retourne les noms des versions importées
+    - get : Retourne la ligne d'un identifiant dans une version
+    - factor_index : Retourne l'index (StoreIndex) d'une version
+    - plan : Retourne le plan d'évaluation du questionnaire pour une version
+    '''
+    def __init__(self, path='basecarbone.sqlite'):
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(SCHEMA)
+        self._plans = {}
+
+    def close(self):
+        self.connection.close()
+
+    def versions(self):
+        return [name for (name,) in self.connection.execute('SELECT name FROM versions ORDER BY id')]
+
+    def _version_id(self, version=None):
+        if version is None:
+            row = self.connection.execute('SELECT id FROM versions ORDER BY id DESC LIMIT 1').fetchone()
+        else:
+            row = self.connection.execute('SELECT id FROM versions WHERE name = ?', (version,)).fetchone()
+        if row is None:
+            raise KeyError(f"Version inconnue : {version}")
+        return row[0]
+
+    def import_release(self, version, base_sample):
+        '''
+        Importe une version de la base (DataFrame au format de data.load_and_clean_data).
+        Un identifiant présent plusieurs fois n'est gardé qu'une fois (premiere ligne).
+        L'ordre des lignes compte (lookup retourne la premiere ligne qui correspond, comme data.FactorIndex) :
+        les lignes dont l'ordre relatif ne change pas gardent leur position, une ligne déplacée compte comme modifiée.
+
+        Retourne: dictionnaire du nombre de lignes 'added', 'changed', 'removed' et 'unchanged'
+        '''
+        release = pd.DataFrame({
+            'identifier': base_sample['Identifiant de l\'élément'].astype('int64'),
+            'name': base_sample['Nom base français'].astype('object'),
+            'unit': base_sample['Unité français'].astype('object'),
+            'factor': base_sample['Total poste non décomposé'].astype(float),
+            'attribute': base_sample['Nom attribut français'].astype('object'),
+            'uncertainty': pd.to_numeric(base_sample['Incertitude'], errors='coerce') if 'Incertitude' in base_sample else float('nan'),
+        }).drop_duplicates('identifier')
+        release = release.astype(object).where(release.notna(), None)
+
+        with self.connection:
+            cursor = self.connection.execute('INSERT INTO versions (name) VALUES (?)', (version,))
+            version_id = cursor.lastrowid
+            self.connection.execute('CREATE TEMP TABLE IF NOT EXISTS release (identifier INTEGER PRIMARY KEY, position REAL, '
+                                    'name TEXT, unit TEXT, factor REAL, attribute TEXT, uncertainty REAL)')
+            self.connection.execute('DELETE FROM release')
+            self.connection.executemany('INSERT INTO release VALUES (?, ?, ?, ?, ?, ?, ?)',
+                                        [(row[0], position) + tuple(row[1:])
+                                         for position, row in zip(self._positions(release['identifier']), release.itertuples(index=False))])
+
+            current = 'SELECT * FROM factors WHERE valid_to IS NULL'
+            differs = ' OR '.join(f'factors.{field} IS NOT release.{field}' for field in FIELDS + ['position'])
+            counts = {}
+            counts['removed'] = self.connection.execute(
+                'UPDATE factors SET valid_to = ? WHERE valid_to IS NULL AND identifier NOT IN (SELECT identifier FROM release)',
+                (version_id,)).rowcount
+            counts['changed'] = self.connection.execute(
+                f'UPDATE factors SET valid_to = ? WHERE valid_to IS NULL AND valid_from < ? AND EXISTS '
+                f'(SELECT 1 FROM release WHERE release.identifier = factors.identifier AND ({differs}))',
+                (version_id, version_id)).rowcount
+            # Lignes nouvelles ou modifiées : plus de ligne courante pour cet identifiant
+            inserted = [(version_id, *row) for row in self.connection.execute(
+                f'SELECT identifier, position, name, unit, factor, attribute, uncertainty FROM release '
+                f'WHERE identifier NOT IN (SELECT identifier FROM ({current}))')]
+            self.connection.executemany(
+                'INSERT INTO factors (valid_from, identifier, position, name, name_key, unit, factor, attribute, attribute_key, uncertainty) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                [(version_id, identifier, position, name, data.normalize(name), unit, factor, attribute, data.normalize(attribute), uncertainty)
+                 for version_id, identifier, position, name, unit, factor, attribute, uncertainty in inserted])
+            counts['added'] = len(inserted) - counts['changed']
+            counts['unchanged'] = len(release) - len(inserted)
+        return counts
+
+    def _positions(self, identifiers):
+        '''
+        Positions des lignes d'une nouvelle version, croissantes dans l'ordre de la version.
+        La plus longue suite de lignes déjà présentes dans le même ordre garde ses positions (une ligne supprimée
+        ou ajoutée ne décale pas les suivantes) ; les autres lignes reçoivent des positions intermédiaires.
+        '''
+        current = dict(self.connection.execute('SELECT identifier, position FROM factors WHERE valid_to IS NULL'))
+        previous = [current.get(identifier) for identifier in identifiers]
+        # Plus longue sous-suite strictement croissante des anciennes positions (O(n log n))
+        tails, tail_rows, parents = [], [], [None] * len(previous)
+        for row, position in enumerate(previous):
+            if position is None:
+                continue
+            k = bisect.bisect_left(tails, position)
+            parents[row] = tail_rows[k - 1] if k > 0 else None
+            if k == len(tails):
+                tails.append(position)
+                tail_rows.append(row)
+            else:
+                tails[k] = position
+                tail_rows[k] = row
+        kept = set()
+        row = tail_rows[-1] if tail_rows else None
+        while row is not None:
+            kept.add(row)
+            row = parents[row]
+
+        positions = [previous[row] if row in kept else None for row in range(len(previous))]
+        start = 0
+        while start < len(positions):
+            if positions[start] is not None:
+                start += 1
+                continue
+            end = start
+            while end < len(positions) and positions[end] is None:
+                end += 1
+            low = positions[start - 1] if start > 0 else None
+            high = positions[end] if end < len(positions) else None
+            count = end - start
+            for k in range(count):
+                if low is None and high is None:
+                    positions[start + k] = float(k)
+                elif low is None:
+                    positions[start + k] = high - count + k
+                elif high is None:
+                    positions[start + k] = low + k + 1
+                else:
+                    positions[start + k] = low + (high - low) * (k + 1) / (count + 1)
+            start = end
+        return positions
+
+    def get(self, identifier, version=None):
+        '''
+        Retourne: dictionnaire de la ligne de l'identifiant dans la version (la derniere par défaut), None si elle n'existe pas
+        '''
+        version_id = self._version_id(version)
+        row = self.connection.execute(
+            f'SELECT identifier, name, unit, factor, attribute, uncertainty FROM factors WHERE identifier = ? AND {VALID}',
+            (identifier, version_id, version_id)).fetchone()
+        return dict(zip(['identifier'] + FIELDS, row)) if row is not None else None
+
+    def factor_index(self, version=None):
+        return StoreIndex(self, self._version_id(version))
+
+    def plan(self, version=None):
+        '''
+        Retourne le plan d'évaluation du questionnaire compilé une seule fois pour la version
+        '''
+        version_id = self._version_id(version)
+        if version_id not in self._plans:
+            self._plans[version_id] = questionnaire.EvaluationPlan(StoreIndex(self, version_id))
+        return self._plans[version_id]
+
+class StoreIndex:
+    '''
+    Index des facteurs d'une version du FactorStore, mêmes recherches que data.FactorIndex par requêtes SQL
+    Methodes:
+    - lookup : Retourne le facteur d'une sous categorie, éventuellement filtré par attribut
+    - lookup_uncertainty : Retourne l'incertitude relative de la même ligne
+    '''
+    def __init__(self, store, version_id):
+        self.store = store
+        self.version_id = version_id
+        self._resolved = {}
+
+    def lookup(self, name, attribute=None):
+        row = self._row(name, attribute)
+        return row[0] if row is not None else None
+
+    def lookup_uncertainty(self, name, attribute=None):
+        row = self._row(name, attribute)
+        return row[1] / 100 if row is not None and row[1] is not None else float('nan')
+
+    def _row(self, name, attribute):
+        key = (data.normalize(name), data.normalize(attribute) if attribute is not None else None)
+        if key not in self._resolved:
+            name_key, attribute_key = key
+            if attribute_key is None:
+                # Recherche d'une partie du nom : instr ne peut pas utiliser l'index factors_name, les lignes valables
+                # sont parcourues (une seule fois par nom et par StoreIndex grâce à _resolved)
+                condition, parameters = "instr(name_key, ?) > 0", (name_key,)
+            else:
+                condition, parameters = "name_key = ? AND instr(attribute_key, ?) > 0", (name_key, attribute_key)
+            self._resolved[key] = self.store.connection.execute(
+                f'SELECT factor, uncertainty FROM factors WHERE {condition} AND {VALID} ORDER BY position LIMIT 1',
+                parameters + (self.version_id, self.version_id)).fetchone()
+        return self._resolved[key]
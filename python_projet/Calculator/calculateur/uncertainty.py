@@ -0,0 +1,126 @@
+'''
+Propagation par Monte-Carlo de l'incertitude des facteurs d'emission
+Chaque facteur est tiré n_samples fois suivant une loi log-normale de moyenne le facteur de la base
+et dont l'intervalle à 95% correspond à l'incertitude de la base ('Incertitude', en %) ou à un écart relatif choisi.
+Les tirages sont propagés en une seule opération NumPy par morceau de répondants et d'entrées,
+la taille des morceaux est choisie pour que les tableaux intermédiaires restent sous max_bytes
+tant que les categories d'un répondant y tiennent (voir propagate pour la mémoire réellement utilisée).
+
+    -sample_factors : Retourne les tirages des facteurs pondérés par la conversion en annuel
+    -propagate : Retourne moyenne et bornes de l'intervalle de confiance pour un vecteur ou une matrice de réponses
+    -calculate_uncertainty : Retourne les intervalles de confiance d'un utilisateur
+    -calculate_batch_uncertainty : Retourne les intervalles de confiance des répondants d'un fichier d'enquête
+'''
+
+import numpy as np
+import pandas as pd
+from . import data
+from . import questionnaire
+
+DEFAULT_SPREAD = 0.2  # écart relatif à 95% quand la base ne donne pas d'incertitude
+MAX_BYTES = 64 * 1024 * 1024
+
+def sample_factors(plan, n_samples=10000, default_spread=DEFAULT_SPREAD, spreads=None, seed=None):
+    '''
+    Tire n_samples valeurs de chaque facteur du plan
+
+    Arguments:
+        plan: questionnaire.EvaluationPlan
+        default_spread: incertitude relative à 95% utilisée quand la base n'en donne pas
+        spreads: dictionnaire {sous categorie: incertitude relative} prioritaire sur la base
+
+    Retourne: tableau (n_samples, entrées du plan) des facteurs multipliés par leur conversion en annuel
+    '''
+    uncertainties = np.where(np.isnan(plan.uncertainties), default_spread, plan.uncertainties)
+    for sub_category, spread in (spreads or {}).items():
+        if sub_category in plan.sub_categories:
+            uncertainties[plan.sub_categories.index(sub_category)] = spread
+    # Loi log-normale : 95% des tirages entre facteur/(1+u) et facteur*(1+u) environ, moyenne égale au facteur
+    sigma = np.log1p(uncertainties) / 1.96
+    mu = np.log(np.where(plan.weights > 0, plan.weights, 1.0)) - sigma ** 2 / 2
+    rng = np.random.default_rng(seed)
+    samples = np.exp(mu + sigma * rng.standard_normal((n_samples, len(plan.weights))))
+    return np.where(plan.weights > 0, samples, plan.weights)
+
+def propagate(plan, answers, weights_samples, confidence=0.95, max_bytes=MAX_BYTES):
+    '''
+    Propage les tirages des facteurs sur des réponses
+
+    Arguments:
+        answers: vecteur (entrées du plan) ou matrice (répondants, entrées du plan) de réponses
+        weights_samples: tirages retournés par sample_factors
+        max_bytes: mémoire visée pour les tableaux intermédiaires d'un morceau
+
+    Mémoire : weights_samples est gardé en entier (8 * n_samples * entrées octets). Un quantile exact demande
+    tous les tirages d'une valeur, les morceaux sont donc pris sur les répondants puis sur les entrées, jamais sur
+    les tirages : chaque valeur (répondant, entrée ou categorie) d'un morceau occupe 8 * n_samples octets,
+    recopiés une fois par np.quantile, soit 16 * n_samples octets. Les morceaux restent sous max_bytes tant que
+    les categories d'un répondant y tiennent ; sinon la mémoire utilisée est 16 * n_samples * categories octets.
+
+    Retourne: dictionnaire {'detailed': (moyenne, borne basse, borne haute), 'categories': (...)},
+              chaque tableau a la forme (répondants, entrées) ou (répondants, categories)
+    '''
+    answers = np.atleast_2d(answers)
+    n_samples, n_entries = weights_samples.shape
+    n_categories = len(plan.categories)
+    bounds = [(1 - confidence) / 2, (1 + confidence) / 2]
+    # Nombre de valeurs (tous leurs tirages, recopiés par np.quantile) par morceau
+    cells = max(1, max_bytes // (16 * n_samples))
+    row_chunk = max(1, cells // (n_entries + n_categories))
+    detailed = [np.empty((len(answers), n_entries)) for _ in range(3)]
+    categories = [np.empty((len(answers), n_categories)) for _ in range(3)]
+
+    def summarize(results, index, values):
+        results[0][index] = values.mean(axis=0)
+        results[1][index], results[2][index] = np.quantile(values, bounds, axis=0)
+
+    for start in range(0, len(answers), row_chunk):
+        rows = slice(start, start + row_chunk)
+        block = answers[rows]
+        # Totaux par categorie sans former les émissions de toutes les entrées : tirages @ (réponses * appartenance)
+        scaled = (block[:, :, None] * plan.membership).transpose(1, 0, 2).reshape(n_entries, -1)
+        summarize(categories, rows, (weights_samples @ scaled).reshape(n_samples, len(block), n_categories))
+        column_chunk = max(1, cells // len(block))
+        for column in range(0, n_entries, column_chunk):
+            columns = slice(column, column + column_chunk)
+            summarize(detailed, (rows, columns), weights_samples[:, None, columns] * block[None, :, columns])
+    return {'detailed': tuple(detailed), 'categories': tuple(categories)}
+
+def calculate_uncertainty(answers, n_samples=10000, confidence=0.95, default_spread=DEFAULT_SPREAD, spreads=None, seed=None):
+    '''
+    Intervalles de confiance de l'empreinte d'un utilisateur
+
+    Arguments:
+        answers: dictionnaire des réponses, comme questionnaire.EvaluationPlan.answer_vector
+
+    Retourne: (detailed_emissions, category_emissions), chaque valeur est {'mean', 'low', 'high'}
+    '''
+    plan = questionnaire.get_plan()
+    samples = sample_factors(plan, n_samples, default_spread, spreads, seed)
+    result = propagate(plan, plan.answer_vector(answers), samples, confidence)
+    detailed_emissions = {}
+    for j, sub_category in enumerate(plan.sub_categories):
+        column, choice_column, choice = plan.inputs[j]
+        if choice is None or choice_column in answers and data.normalize(answers[choice_column]) == choice:
+            detailed_emissions[sub_category] = dict(zip(('mean', 'low', 'high'), (float(a[0, j]) for a in result['detailed'])))
+    category_emissions = {category: dict(zip(('mean', 'low', 'high'), (float(a[0, j]) for a in result['categories'])))
+                          for j, category in enumerate(plan.categories)}
+    return detailed_emissions, category_emissions
+
+def calculate_batch_uncertainty(responses, n_samples=10000, confidence=0.95, default_spread=DEFAULT_SPREAD,
+                                spreads=None, seed=None, base_sample=None, max_bytes=MAX_BYTES):
+    '''
+    Intervalles de confiance de l'empreinte de chaque répondant d'un fichier d'enquête.
+    Les mêmes tirages des facteurs servent pour tous les répondants.
+
+    Retourne: (detailed_emissions, category_emissions) sous forme de DataFrame avec des colonnes (sous categorie, 'mean'|'low'|'high')
+    '''
+    plan = questionnaire.get_plan(base_sample)
+    samples = sample_factors(plan, n_samples, default_spread, spreads, seed)
+    result = propagate(plan, plan.answer_matrix(responses), samples, confidence, max_bytes)
+    frames = []
+    for key, names in (('detailed', plan.sub_categories), ('categories', plan.categories)):
+        columns = pd.MultiIndex.from_product([names, ['mean', 'low', 'high']])
+        values = np.stack(result[key], axis=2).reshape(len(responses), -1)
+        frames.append(pd.DataFrame(values, index=responses.index, columns=columns))
+    return frames[0], frames[1]
@@ -0,0 +1,36 @@
+'''
+Fonctions utilitaires sans dépendance à pandas, utilisables par le calcul rapide (plan compilé)
+    -normalize : Retourne un texte sans accent ni majuscule
+    -tokenize : Retourne la liste des mots d'un texte sans accent ni majuscule
+    -fingerprint : Retourne l'empreinte (chemin, date de modification, taille) des fichiers sources
+'''
+
+import os
+import re
+import unicodedata
+
+def normalize(text):
+    '''
+    Met un texte en minuscule et retire les accents ('Électrique' -> 'electrique')
+    Les valeurs manquantes (NaN) donnent une chaîne vide
+    '''
+    if not isinstance(text, str):
+        return ''
+    text = unicodedata.normalize('NFKD', text)
+    return ''.join(c for c in text if not unicodedata.combining(c)).lower().strip()
+
+def tokenize(text):
+    '''
+    Retourne la liste des mots d'un texte sans accent ni majuscule
+    '''
+    return re.findall(r'\w+', normalize(text))
+
+def fingerprint(*paths):
+    '''
+    Retourne l'empreinte des fichiers : chemin absolu, date de modification et taille de chacun
+    '''
+    result = []
+    for path in paths:
+        stat = os.stat(path)
+        result.append((os.path.abspath(path), stat.st_mtime_ns, stat.st_size))
+    return tuple(result)
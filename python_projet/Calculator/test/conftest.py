@@ -0,0 +1,44 @@
+# conftest.py
+
+import os
+import sys
+
+# Le paquet calculateur est importé depuis le dossier du projet (from calculateur import data), sans installation
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import shutil
+import pytest
+
+SAMPLE_CSV = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'calculateur', 'basecarbone_sample.csv')
+
+# Extrait au format de basecarbone-v17-fr.csv : seules les lignes Bus et Bovin viande sont gardées par load_and_clean_data
+FULL_CSV = (
+    "Identifiant de l'élément,Nom base français,Unité français,Total poste non décomposé,Nom attribut français,Commentaire français\n"
+    "1,Bus,kgCO2e/passager.km,0.113,moyen,a\n"
+    "2,Tramway,kgCO2e/passager.km,0.004,,b\n"
+    "3,Bovin viande,kgCO2e/kg,28.7,,c\n"
+)
+
+# Réponses complètes d'un utilisateur au questionnaire
+ANSWERS = {'avion': 1000, 'TGV': 500, 'motorisation': 'essence', 'motorisation_km': 100,
+           'Métro': 50, 'RER': 25, 'Bus': 10, 'Gaz': 2000, 'Electricité': 5, 'Repas': 3, 'viande': 2}
+
+@pytest.fixture
+def answers():
+    '''
+    Copie de ANSWERS, modifiable par le test
+    '''
+    return dict(ANSWERS)
+
+@pytest.fixture
+def base_files(tmp_path, monkeypatch):
+    '''
+    Place les deux fichiers sources dans un dossier temporaire utilisé comme dossier courant
+    '''
+    from calculateur import data
+    shutil.copy(SAMPLE_CSV, tmp_path / 'basecarbone_sample.csv')
+    (tmp_path / 'basecarbone-v17-fr.csv').write_text(FULL_CSV, encoding='utf-8')
+    monkeypatch.chdir(tmp_path)
+    data.clear_cache()
+    yield tmp_path
+    data.clear_cache()
@@ -0,0 +1,55 @@
+# test_aggregate.py
+
+import pytest
+import numpy as np
+import pandas as pd
+from calculateur.aggregate import QuantileSketch, PopulationAggregator
+
+def test_sketch_relative_accuracy():
+    values = np.random.default_rng(0).lognormal(5, 1, 10000)
+    sketch = QuantileSketch(relative_accuracy=0.01)
+    sketch.update(values)
+    for q in (0.1, 0.5, 0.9, 0.99):
+        assert sketch.quantile(q) == pytest.approx(np.quantile(values, q, method='lower'), rel=0.02)
+
+def test_sketch_zeros_and_negatives():
+    sketch = QuantileSketch()
+    sketch.update([-10.0, 0.0, 0.0, 5.0, np.nan])
+    assert sketch.count == 4
+    assert sketch.quantile(0) == pytest.approx(-10, rel=0.01)
+    assert sketch.quantile(0.5) == 0.0
+
+def test_non_finite_values_ignored():
+    sketch = QuantileSketch()
+    sketch.update([1.0, 2.0, np.inf, -np.inf, 3.0])
+    assert sketch.count == 3
+    assert sketch.quantile(0.5) == pytest.approx(2.0, rel=0.01)
+    aggregator = PopulationAggregator()
+    aggregator.update_one({'Gaz': np.inf}, {'energie': np.inf})
+    aggregator.update_one({'Gaz': 100.0}, {'energie': 100.0})
+    summary = aggregator.summary(level='category')
+    assert summary.loc['energie', 'count'] == 1
+    assert np.isfinite(summary.loc['energie'].to_numpy(dtype=float)).all()
+
+def test_merge_equals_single_pass():
+    rng = np.random.default_rng(1)
+    detailed = pd.DataFrame({'avion': rng.exponential(200, 1000), 'Gaz': rng.exponential(3000, 1000)})
+    categories = pd.DataFrame({'transport': detailed['avion'], 'energie': detailed['Gaz']})
+    whole = PopulationAggregator()
+    whole.update(detailed, categories)
+    left, right = PopulationAggregator(), PopulationAggregator()
+    left.update(detailed[:400], categories[:400])
+    right.update(detailed[400:], categories[400:])
+    left.merge(right)
+    pd.testing.assert_frame_equal(left.summary(), whole.summary())
+    summary = left.summary(level='category')
+    assert summary.loc['energie', 'count'] == 1000
+    assert summary.loc['energie', 'sum'] == pytest.approx(detailed['Gaz'].sum())
+    assert summary.loc['energie', 'max'] == detailed['Gaz'].max()
+    assert left.top_contributors(1)[0][0] == 'Gaz'
+
+def test_update_one():
+    aggregator = PopulationAggregator()
+    aggregator.update_one({'avion': 10.0}, {'transport': 10.0})
+    aggregator.update_one({'avion': 30.0}, {'transport': 30.0})
+    assert aggregator.summary().loc['avion', 'mean'] == 20.0
@@ -0,0 +1,22 @@
+# test_benchmarks.py
+
+import os
+import sys
+import json
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
+
+import synthetic
+import bench_calculator
+
+def test_generate_responses_reproducible():
+    responses = synthetic.generate_responses(50, seed=1)
+    assert len(responses) == 50
+    assert responses.equals(synthetic.generate_responses(50, seed=1))
+    assert set(responses['motorisation']) <= {'électrique', 'essence'}
+
+def test_run_saves_json():
+    result = bench_calculator.run(sizes=[100], repeat=1, full_rows=1000, chart=False)
+    assert set(result['results']) == {'load', 'lookup', 'batch'}
+    assert result['results']['batch']['100']['respondents_per_second'] > 0
+    json.dumps(result)
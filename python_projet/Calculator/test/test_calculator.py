@@ -0,0 +1,50 @@
+# test_calculator.py
+
+import pytest
+import pandas as pd
+from unittest.mock import patch
+from calculateur import calculator
+
+ANSWERS = [1000, 500, 100, 50, 25, 10, 2000, 5, 3, 2]
+
+RESPONSES = pd.DataFrame([
+    {'avion': 1000, 'TGV': 500, 'motorisation': 'essence', 'motorisation_km': 100,
+     'Métro': 50, 'RER': 25, 'Bus': 10, 'Gaz': 2000, 'Electricité': 5, 'Repas': 3, 'viande': 2},
+    {'avion': 0, 'TGV': 0, 'motorisation': 'électrique', 'motorisation_km': 100,
+     'Métro': 0, 'RER': 0, 'Bus': 0, 'Gaz': 0, 'Electricité': 0, 'Repas': 0, 'viande': 0},
+])
+
+@patch('calculateur.calculator.get_text_input', return_value='essence')
+@patch('calculateur.calculator.get_numeric_input', side_effect=ANSWERS)
+def test_calculate(mock_numeric_input, mock_text_input, base_files):
+    detailed_emissions, category_emissions = calculator.calculate()
+    assert detailed_emissions['avion'] == pytest.approx(1000 * 0.209)
+    assert detailed_emissions['voiture_essence'] == pytest.approx(100 * 52 * 0.259)
+    assert detailed_emissions['Bus'] == pytest.approx(10 * 52 * 0.113)
+    assert category_emissions['energie'] == pytest.approx(2000 * 2.15 + 5 * 0.0571)
+
+@patch('calculateur.calculator.get_text_input', return_value='essence')
+@patch('calculateur.calculator.get_numeric_input', side_effect=ANSWERS)
+def test_calculate_batch_matches_calculate(mock_numeric_input, mock_text_input, base_files):
+    detailed_emissions, category_emissions = calculator.calculate()
+    batch_detailed, batch_categories = calculator.calculate_batch(RESPONSES)
+    assert batch_detailed.iloc[0][list(detailed_emissions)].to_dict() == pytest.approx(detailed_emissions)
+    assert batch_categories.iloc[0].to_dict() == pytest.approx(category_emissions)
+
+def test_calculate_batch_missing_factor(base_files):
+    # Pas de facteur 'Voiture' électrique dans la base : la colonne n'est pas produite
+    batch_detailed, batch_categories = calculator.calculate_batch(RESPONSES)
+    assert 'voiture_électrique' not in batch_detailed
+    assert batch_detailed.loc[1, 'voiture_essence'] == 0
+    assert batch_categories.loc[1].sum() == 0
+
+def test_calculate_batch_modified_base(base_files):
+    from calculateur import data
+    base_sample = data.get_base_sample()
+    calculator.calculate_batch(RESPONSES, base_sample)
+    zero = base_sample.assign(**{'Total poste non décomposé': 0.0})
+    batch_detailed, batch_categories = calculator.calculate_batch(RESPONSES, base_sample=zero)
+    assert (batch_categories.to_numpy() == 0).all()
+    doubled = base_sample.assign(**{'Total poste non décomposé': base_sample['Total poste non décomposé'] * 2})
+    assert calculator.calculate_batch(RESPONSES, base_sample=doubled)[1].loc[0, 'transport'] == pytest.approx(
+        2 * calculator.calculate_batch(RESPONSES, base_sample)[1].loc[0, 'transport'])
@@ -0,0 +1,133 @@
+# test_data.py
+
+import pytest
+import numpy as np
+import pandas as pd
+from calculateur.data import normalize, FactorIndex, get_factor_index
+
+base_sample = pd.DataFrame({
+    'Nom base français': ['Avion', 'Avion', 'Voiture particulière', 'Voiture particulière', 'Voiture', 'Gaz naturel', 'Bovin viande'],
+    'Nom attribut français': ['court', 'long', 'motorisation gazole', 'motorisation essence', 'Électrique', None, 'steak'],
+    'Total poste non décomposé': [0.2, 0.3, 0.251, 0.259, 0.1, 2.15, 7.2]
+})
+
+def test_normalize():
+    assert normalize('Électrique') == 'electrique'
+    assert normalize(' Métro ') == 'metro'
+    assert normalize(float('nan')) == ''
+
+def test_lookup_first_match():
+    index = FactorIndex(base_sample)
+    assert index.lookup('avion') == 0.2
+    assert index.lookup('Gaz') == 2.15
+    assert index.lookup('viande') == 7.2
+    assert index.lookup('voiture') == 0.251
+
+def test_lookup_attribute_accents():
+    index = FactorIndex(base_sample)
+    assert index.lookup('Voiture particulière', 'essence') == 0.259
+    assert index.lookup('Voiture', 'electrique') == 0.1
+    assert index.lookup('voiture', 'électrique') == 0.1
+    assert index.lookup('Voiture particulière', 'électrique') is None
+    assert index.lookup('Bus') is None
+
+def test_get_factor_index_cached():
+    frame = base_sample.copy()
+    index = get_factor_index(frame)
+    assert get_factor_index(frame) is index
+
+def test_derived_frames_get_their_own_index():
+    from calculateur import data
+    frame = base_sample.copy()
+    assert get_factor_index(frame).lookup('avion') == 0.2
+    filtered = frame[frame['Nom base français'] != 'Avion']
+    assert get_factor_index(filtered).lookup('avion') is None
+    doubled = frame.assign(**{'Total poste non décomposé': frame['Total poste non décomposé'] * 2})
+    assert get_factor_index(doubled).lookup('avion') == 0.4
+    frame.loc[0, 'Total poste non décomposé'] = 0.5
+    data.forget(frame)
+    assert get_factor_index(frame).lookup('avion') == 0.5
+
+def test_get_base_sample_cached(base_files):
+    from calculateur import data
+    first = data.get_base_sample()
+    assert data.get_base_sample() is first
+    assert set(first['Nom base français']) >= {'Bus', 'Bovin viande'}
+    assert 'Tramway' not in set(first['Nom base français'])
+
+def test_get_base_sample_reloads_on_change(base_files):
+    from calculateur import data
+    first = data.get_base_sample()
+    with open(base_files / 'basecarbone_sample.csv', 'a', encoding='utf-8') as f:
+        f.write("\n99999;Vélo;kgCO2e/km;0.0;")
+    second = data.get_base_sample()
+    assert second is not first
+    assert 'Vélo' in set(second['Nom base français'])
+
+def test_snapshot_reused(base_files, monkeypatch):
+    from calculateur import data
+    first = data.get_base_sample()
+    assert (base_files / data.SNAPSHOT_PATH).exists()
+    data.clear_cache()
+    monkeypatch.setattr(data, 'load_and_clean_data', lambda *args: pytest.fail('les CSV ne doivent pas être relus'))
+    second = data.get_base_sample()
+    assert list(second.columns) == list(first.columns)
+    assert second['Total poste non décomposé'].tolist() == first['Total poste non décomposé'].tolist()
+    assert second['Nom attribut français'].isna().sum() == first['Nom attribut français'].isna().sum()
+    assert data.get_factor_index(second).lookup('viande') == 28.7
+    pd.testing.assert_frame_equal(second, first)
+    second.loc[second.index[0], 'Nom base français'] = 'Nouveau nom'
+
+def test_snapshot_rebuilt_on_change(base_files):
+    from calculateur import data
+    data.get_base_sample()
+    data.clear_cache()
+    with open(base_files / 'basecarbone-v17-fr.csv', 'a', encoding='utf-8') as f:
+        f.write("4,Bus,kgCO2e/passager.km,0.2,nuit,d\n")
+    base_sample = data.get_base_sample()
+    assert (base_sample['Nom base français'] == 'Bus').sum() == 2
+
+def test_read_base_full_chunks(base_files):
+    from calculateur import data
+    with open(base_files / 'basecarbone-v17-fr.csv', 'a', encoding='utf-8') as f:
+        f.write("4,Bus,kgCO2e/passager.km,0.2,nuit,d\n")
+    filtered = data.read_base_full(chunksize=1)
+    assert filtered['Nom base français'].tolist() == ['Bus', 'Bus', 'Bovin viande']
+    assert list(filtered.columns) == data.COMMON_COLUMNS
+    filtered = data.read_base_full(enriched_bases=['Tramway'], chunksize=2)
+    assert filtered['Total poste non décomposé'].tolist() == [0.004]
+
+def test_enriched_bases_configurable(base_files):
+    from calculateur import data
+    base_sample = data.get_base_sample(enriched_bases=['Tramway'])
+    names = set(base_sample['Nom base français'])
+    assert 'Tramway' in names and 'Bus' not in names
+
+def test_lookup_uncertainty():
+    frame = base_sample.assign(Incertitude=[10, 20, None, 5, 30, 15, 50])
+    index = FactorIndex(frame)
+    assert index.lookup_uncertainty('avion') == pytest.approx(0.1)
+    assert index.lookup_uncertainty('Voiture particulière', 'essence') == pytest.approx(0.05)
+    assert np.isnan(index.lookup_uncertainty('voiture'))
+    assert np.isnan(FactorIndex(base_sample).lookup_uncertainty('avion'))
+
+def test_search_ranked(base_files):
+    from calculateur import data
+    results = data.search('voiture essence')
+    assert results[0]['identifier'] == 21610
+    assert results[0]['unit'] == 'kgCO2e/km' and results[0]['factor'] == 0.259
+    assert [result['score'] for result in results] == sorted((result['score'] for result in results), reverse=True)
+
+def test_search_accents_and_prefix(base_files):
+    from calculateur import data
+    assert data.search('electricite', limit=1)[0]['name'] == 'Electricité'
+    assert data.search('METRO', limit=1)[0]['identifier'] == 21714
+    assert data.search('bovin', prefix=False)[0]['name'] == 'Bovin viande'
+    assert {result['name'] for result in data.search('avi', limit=50)} == {'Avion'}
+    assert data.search('trottinette') == []
+
+def test_search_filtered_base(base_files):
+    from calculateur import data
+    base_sample = data.get_base_sample()
+    assert data.search('avion', base_sample, limit=1)[0]['name'] == 'Avion'
+    assert data.search('avion', base_sample[base_sample['Nom base français'] != 'Avion']) == []
@@ -0,0 +1,24 @@
+# test_import_time.py
+
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
+
+import import_time
+
+# Marge sur les budgets : la mesure varie d'une machine à l'autre
+MARGIN = 2
+
+def test_no_heavy_imports():
+    results, failures = import_time.check(margin=None)
+    assert set(results) == set(import_time.BUDGETS)
+    assert failures == []
+
+# Les temps dépendent de la charge de la machine : vérifiés seulement avec CALCULATEUR_IMPORT_BUDGETS=1
+# (ou par python benchmarks/import_time.py)
+@pytest.mark.skipif(not os.environ.get('CALCULATEUR_IMPORT_BUDGETS'), reason="CALCULATEUR_IMPORT_BUDGETS non défini")
+def test_import_budgets():
+    results, failures = import_time.check(margin=MARGIN)
+    assert failures == []
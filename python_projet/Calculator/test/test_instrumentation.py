@@ -0,0 +1,36 @@
+# test_instrumentation.py
+
+import json
+import pytest
+from calculateur import data
+from calculateur import questionnaire
+from calculateur import instrumentation
+
+@pytest.fixture
+def timing(tmp_path):
+    path = tmp_path / 'timing.jsonl'
+    instrumentation.reset()
+    instrumentation.enable(str(path))
+    yield path
+    instrumentation.disable()
+    instrumentation.reset()
+
+def test_stages_recorded(base_files, timing):
+    base_sample = data.get_base_sample(snapshot_path=None)
+    plan = questionnaire.get_plan(base_sample)
+    plan.evaluate(plan.answer_vector({'avion': 1000}))
+    report = instrumentation.report()
+    assert report['load_and_clean_data']['calls'] == 1
+    assert report['load_and_clean_data']['rows'] == len(base_sample)
+    assert report['read_base_full']['rows'] == 3
+    assert report['factor_resolution']['rows'] == len(plan.sub_categories) + len(plan.missing)
+    assert report['roll_up'] == dict(report['roll_up'], calls=1, rows=1)
+    lines = [json.loads(line) for line in timing.read_text(encoding='utf-8').splitlines()]
+    assert {line['stage'] for line in lines} == set(report)
+
+def test_disabled_records_nothing(base_files):
+    instrumentation.reset()
+    with instrumentation.stage('roll_up', rows=5) as stage:
+        stage.rows += 10
+        assert stage.rows == 0
+    assert instrumentation.report() == {}
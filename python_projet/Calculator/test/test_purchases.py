@@ -0,0 +1,33 @@
+# test_purchases.py
+
+import pytest
+import pandas as pd
+from calculateur.purchases import score_purchases
+
+PURCHASES = pd.DataFrame({
+    'respondent': ['a', 'a', 'b', 'a', 'b', 'c'],
+    'Identifiant de l\'élément': [1, 3, 1, 21818, 999999, 3],
+    'quantity': [100.0, 2.0, 10.0, 1000.0, 5.0, 1.0],
+})
+
+def test_join_and_grouped_sum(base_files):
+    category_emissions, unmatched = score_purchases(PURCHASES)
+    assert category_emissions.loc['a', 'Bus'] == pytest.approx(100 * 0.113)
+    assert category_emissions.loc['a', 'Bovin viande'] == pytest.approx(2 * 28.7)
+    assert category_emissions.loc['a', 'Avion'] == pytest.approx(1000 * 0.209)
+    assert category_emissions.loc['b', 'total'] == pytest.approx(10 * 0.113)
+    assert category_emissions.loc['c', 'Bus'] == 0
+    assert unmatched.to_dict() == {999999: 1}
+
+def test_chunks_match_single_pass(base_files):
+    single, _ = score_purchases(PURCHASES)
+    chunked, _ = score_purchases(PURCHASES, chunksize=2)
+    pd.testing.assert_frame_equal(single, chunked)
+
+def test_updated_base_gets_its_own_index(base_files):
+    from calculateur import data
+    base_sample = data.get_base_sample()
+    score_purchases(PURCHASES, base_sample)
+    updated = base_sample.assign(**{'Total poste non décomposé': base_sample['Total poste non décomposé'] * 2})
+    category_emissions, _ = score_purchases(PURCHASES, updated)
+    assert category_emissions.loc['a', 'Avion'] == pytest.approx(2 * 1000 * 0.209)
@@ -0,0 +1,110 @@
+# test_questionnaire.py
+
+import os
+import sys
+import json
+import subprocess
+import importlib.resources
+import pytest
+import numpy as np
+import pandas as pd
+from calculateur import questionnaire
+
+def test_plan_arrays(base_files):
+    plan = questionnaire.get_plan()
+    assert plan is questionnaire.get_plan()
+    assert 'voiture_électrique' in plan.missing
+    j = plan.sub_categories.index('Bus')
+    assert plan.weights[j] == pytest.approx(0.113 * 52)
+    assert plan.categories[plan.category_index[j]] == 'transport'
+    assert plan.membership.sum(axis=1).tolist() == [1.0] * len(plan.sub_categories)
+
+def test_motorisation_counted_in_transport(base_files):
+    plan = questionnaire.get_plan()
+    answers = {'motorisation': 'essence', 'motorisation_km': 100}
+    detailed, category_totals = plan.evaluate(plan.answer_vector(answers))
+    detailed_emissions, category_emissions = plan.to_dicts(detailed, category_totals, answers)
+    assert detailed_emissions['voiture_essence'] == pytest.approx(100 * 52 * 0.259)
+    assert category_emissions['transport'] == pytest.approx(sum(detailed_emissions.values()))
+
+def test_answer_matrix_matches_vector(base_files):
+    plan = questionnaire.get_plan()
+    answers = {column: 2.0 for column in questionnaire.NUMERIC_INPUTS}
+    answers['motorisation'] = 'Essence'
+    matrix = plan.answer_matrix(pd.DataFrame([answers, dict(answers, motorisation='électrique')]))
+    assert np.allclose(matrix[0], plan.answer_vector(answers))
+    assert matrix[1, plan.sub_categories.index('voiture_essence')] == 0
+
+def test_compiled_plan_roundtrip(base_files):
+    plan = questionnaire.get_compiled_plan()
+    assert (base_files / questionnaire.PLAN_PATH).exists()
+    loaded = questionnaire.load_plan(source_fingerprint=None)
+    assert loaded.sub_categories == plan.sub_categories
+    assert loaded.inputs == plan.inputs
+    assert np.array_equal(loaded.weights, plan.weights)
+    # Un fichier source modifié invalide le plan compilé
+    with open(base_files / 'basecarbone-v17-fr.csv', 'a', encoding='utf-8') as file:
+        file.write("4,Bus,kgCO2e/passager.km,0.2,rural,d\n")
+    from calculateur import utils
+    assert questionnaire.load_plan(source_fingerprint=utils.fingerprint('basecarbone_sample.csv', 'basecarbone-v17-fr.csv')) is None
+
+def test_resource_roundtrip(base_files):
+    from calculateur import build_resource
+    plan = build_resource.build(output=str(base_files / questionnaire.RESOURCE))
+    loaded = questionnaire.load_resource(str(base_files / questionnaire.RESOURCE))
+    assert loaded.sub_categories == plan.sub_categories
+    assert loaded.inputs == plan.inputs
+    assert np.array_equal(loaded.weights, plan.weights)
+    assert not loaded.factors.flags.writeable
+    answers = {'avion': 1000, 'motorisation': 'essence', 'motorisation_km': 100}
+    assert np.allclose(loaded.evaluate(loaded.answer_vector(answers))[1], plan.evaluate(plan.answer_vector(answers))[1])
+    assert questionnaire.load_resource(str(base_files / 'absent.bin')) is None
+
+@pytest.fixture
+def package_resource():
+    '''
+    Chemin du fichier RESOURCE dans le paquet calculateur (importlib.resources), remis dans son état d'origine après le test
+    '''
+    resource = importlib.resources.files('calculateur').joinpath(questionnaire.RESOURCE)
+    original = resource.read_bytes() if resource.is_file() else None
+    yield resource
+    if original is not None:
+        resource.write_bytes(original)
+    elif resource.is_file():
+        resource.unlink()
+
+def test_compiled_plan_falls_back_to_resource(base_files, tmp_path, monkeypatch, package_resource):
+    from calculateur import build_resource
+    plan = build_resource.build(output=str(package_resource))
+    empty = tmp_path / 'vide'
+    empty.mkdir()
+    monkeypatch.chdir(empty)
+    assert questionnaire.get_compiled_plan().sub_categories == plan.sub_categories
+    # Nouveau processus sans CSV : le paquet est importé par son nom et le fichier lu par importlib.resources
+    project = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.run([sys.executable, '-c', 'import json, calculateur.questionnaire as q; '
+                             'print(json.dumps(q.get_compiled_plan().weights.tolist()))'],
+                            cwd=empty, env=dict(os.environ, PYTHONPATH=project), capture_output=True, text=True, check=True)
+    assert json.loads(output.stdout) == pytest.approx(plan.weights.tolist())
+    package_resource.unlink()
+    with pytest.raises(FileNotFoundError):
+        questionnaire.get_compiled_plan()
+
+def test_calculate_batch_without_csv(base_files, answers, tmp_path, monkeypatch, package_resource):
+    from calculateur import build_resource, calculator
+    plan = build_resource.build(output=str(package_resource))
+    monkeypatch.chdir(tmp_path)
+    # Sans plan ni CSV, calculate_batch passe par get_plan() qui lit le fichier RESOURCE du paquet
+    results = calculator.calculate_batch(pd.DataFrame([answers]))
+    expected = plan.evaluate(plan.answer_vector(answers))[1]
+    assert results[1].iloc[0].tolist() == pytest.approx(expected.tolist())
+
+def test_write_resource_removes_temporary_file(base_files, monkeypatch):
+    plan = questionnaire.get_plan()
+
+    def fail(source, destination):
+        raise OSError('disque plein')
+    monkeypatch.setattr(questionnaire.os, 'replace', fail)
+    with pytest.raises(OSError):
+        questionnaire.write_resource(plan, str(base_files / questionnaire.RESOURCE))
+    assert list(base_files.glob('*.tmp')) == []
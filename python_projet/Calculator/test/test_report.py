@@ -0,0 +1,23 @@
+# test_report.py
+
+from calculateur.report import EmissionChart, render_reports
+
+EMISSIONS = {'avion': 200.0, 'TGV': 50.0, 'voiture_essence': 100.0, 'Gaz': 300.0}
+
+def test_render_in_memory_reuses_figure():
+    chart = EmissionChart(figsize=(6, 4), dpi=50)
+    first = chart.render(EMISSIONS)
+    figure, bars = chart.figure, chart.bars
+    second = chart.render({key: value * 2 for key, value in EMISSIONS.items()})
+    assert first.startswith(b'\x89PNG') and second.startswith(b'\x89PNG')
+    assert chart.figure is figure and chart.bars is bars
+    assert [bar.get_height() for bar in chart.bars] == [400.0, 100.0, 200.0, 600.0]
+    assert chart.labels[0].get_text() == '400.00'
+
+def test_render_reports_to_paths(tmp_path):
+    reports = [({**EMISSIONS, 'avion': float(i)}, tmp_path / f'user_{i}.png') for i in range(4)]
+    reports.append((EMISSIONS, None))
+    results = render_reports(reports, workers=2, chunksize=2)
+    assert results[:4] == [path for _, path in reports[:4]]
+    assert all(path.exists() for _, path in reports[:4])
+    assert results[4].startswith(b'\x89PNG')
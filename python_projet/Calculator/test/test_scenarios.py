@@ -0,0 +1,31 @@
+# test_scenarios.py
+
+import pytest
+import numpy as np
+import pandas as pd
+from calculateur import calculator
+from calculateur.scenarios import evaluate_grid
+
+def test_grid_matches_batch(base_files, answers):
+    grid = {'motorisation_km': [1, 0.5, 0], 'motorisation': ['essence', 'électrique'], 'Gaz': [1, 0.8]}
+    result = evaluate_grid(answers, grid)
+    assert len(result) == 12
+    assert result['reduction'].is_monotonic_decreasing
+    variants = pd.DataFrame([dict(answers, motorisation_km=answers['motorisation_km'] * row.motorisation_km,
+                                  motorisation=row.motorisation, Gaz=answers['Gaz'] * row.Gaz)
+                             for row in result.itertuples()])
+    detailed, categories = calculator.calculate_batch(variants)
+    assert result['total'].to_numpy() == pytest.approx(detailed.sum(axis=1).to_numpy())
+    assert result['energie'].to_numpy() == pytest.approx(categories['energie'].to_numpy())
+    unchanged = result[(result['motorisation_km'] == 1) & (result['motorisation'] == 'essence') & (result['Gaz'] == 1)]
+    assert unchanged['reduction'].iloc[0] == pytest.approx(0, abs=1e-6)
+
+def test_grid_unknown_column(base_files, answers):
+    with pytest.raises(ValueError):
+        evaluate_grid(answers, {'trottinette': [1, 2]})
+
+def test_large_grid(base_files, answers):
+    grid = {column: np.linspace(0, 2, 10) for column in ['avion', 'TGV', 'Bus', 'Métro', 'RER', 'Gaz']}
+    result = evaluate_grid(answers, grid)
+    assert len(result) == 10 ** 6
+    assert result['total'].min() == pytest.approx(result['total'].iloc[0])
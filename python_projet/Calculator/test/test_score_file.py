@@ -0,0 +1,41 @@
+# test_score_file.py
+
+import pytest
+import pandas as pd
+from calculateur import calculator
+from calculateur.score_file import split_shards, score_file
+
+def write_responses(path, n):
+    responses = pd.DataFrame({
+        'avion': range(n), 'TGV': 1.5, 'motorisation': ['essence', 'électrique'] * (n // 2),
+        'motorisation_km': 20, 'Métro': 1, 'RER': 2, 'Bus': 3, 'Gaz': 100, 'Electricité': 50, 'Repas': 4, 'viande': 2,
+    })
+    responses.to_csv(path, index=False)
+    return responses
+
+def test_split_shards(tmp_path):
+    path = tmp_path / 'reponses.csv'
+    write_responses(path, 100)
+    header, shards = split_shards(path, shard_size=300)
+    content = path.read_bytes()
+    assert header == content[:len(header)]
+    assert shards[0][0] == len(header) and shards[-1][1] == len(content)
+    for (start, end), (next_start, _) in zip(shards, shards[1:]):
+        assert end == next_start and content[end - 1:end] == b'\n'
+
+def test_score_file_matches_batch(base_files):
+    responses = write_responses(base_files / 'reponses.csv', 200)
+    count, totals = score_file(base_files / 'reponses.csv', base_files / 'resultats.csv', workers=2, shard_size=1000)
+    detailed, categories = calculator.calculate_batch(responses)
+    result = pd.read_csv(base_files / 'resultats.csv')
+    assert count == 200 and len(result) == 200
+    assert result['avion'].tolist() == pytest.approx(detailed['avion'].tolist())
+    assert result['transport'].tolist() == pytest.approx(categories['transport'].tolist())
+    assert totals == pytest.approx(categories.sum().to_dict())
+
+def test_score_file_header_only(base_files):
+    write_responses(base_files / 'reponses.csv', 0)
+    count, totals = score_file(base_files / 'reponses.csv', base_files / 'resultats.csv', workers=1)
+    result = pd.read_csv(base_files / 'resultats.csv')
+    assert count == 0 and len(result) == 0
+    assert 'avion' in result.columns and 'transport' in result.columns
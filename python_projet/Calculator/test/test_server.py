@@ -0,0 +1,94 @@
+# test_server.py
+
+import asyncio
+import json
+import pytest
+import pandas as pd
+from calculateur import calculator
+from calculateur.server import FootprintServer, validate_answers
+
+async def post(port, payload):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    body = json.dumps(payload).encode('utf-8')
+    writer.write(b"POST /footprint HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n"
+                 + f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, content = response.partition(b"\r\n\r\n")
+    return int(head.split()[1]), json.loads(content)
+
+def test_footprint_micro_batch(base_files, answers):
+    async def scenario():
+        server = FootprintServer(port=0)
+        await server.start()
+        try:
+            payloads = [dict(answers, avion=i) for i in range(20)]
+            return await asyncio.gather(*(post(server.port, payload) for payload in payloads))
+        finally:
+            await server.close()
+
+    responses = asyncio.run(scenario())
+    detailed, categories = calculator.calculate_batch(pd.DataFrame([dict(answers, avion=i) for i in range(20)]))
+    for i, (status, result) in enumerate(responses):
+        assert status == 200
+        assert result['detailed_emissions'] == pytest.approx(detailed.iloc[i].to_dict())
+        assert result['category_emissions'] == pytest.approx(categories.iloc[i].to_dict())
+
+def test_footprint_bad_request(base_files):
+    async def scenario():
+        server = FootprintServer(port=0)
+        await server.start()
+        try:
+            return await post(server.port, {'avion': 'beaucoup'})
+        finally:
+            await server.close()
+
+    status, result = asyncio.run(scenario())
+    assert status == 400
+    assert 'avion' in result['error']
+
+def test_footprint_overflow_is_rejected(base_files, answers):
+    async def scenario():
+        server = FootprintServer(port=0)
+        await server.start()
+        try:
+            overflow = await post(server.port, dict(answers, Gaz=1e308, Electricité=1e308))
+            # Le regroupement continue après la ligne en erreur
+            return overflow, await post(server.port, answers), server.aggregator.summary(level='category')
+        finally:
+            await server.close()
+
+    (status, result), (next_status, _), summary = asyncio.run(scenario())
+    assert status == 400
+    assert 'non finies' in result['error']
+    assert next_status == 200
+    assert summary.loc['energie', 'count'] == 1
+
+def test_footprint_internal_error(base_files, monkeypatch, answers):
+    from calculateur import server
+
+    def fail(batch):
+        raise RuntimeError('plan indisponible')
+    monkeypatch.setattr(server, 'score_answers', fail)
+
+    async def scenario():
+        footprint_server = FootprintServer(port=0)
+        await footprint_server.start()
+        try:
+            return await post(footprint_server.port, answers)
+        finally:
+            await footprint_server.close()
+
+    status, result = asyncio.run(scenario())
+    assert status == 500
+    assert 'plan indisponible' in result['error']
+
+def test_validate_answers_defaults():
+    answers = validate_answers({'avion': 10, 'motorisation': 'electrique'})
+    assert answers['TGV'] == 0
+    with pytest.raises(ValueError):
+        validate_answers({'motorisation': 'diesel'})
+    for body in ('{"avion": NaN}', '{"avion": Infinity}', '{"Gaz": -Infinity}'):
+        with pytest.raises(ValueError, match='fini'):
+            validate_answers(json.loads(body))
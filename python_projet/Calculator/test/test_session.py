@@ -0,0 +1,35 @@
+# test_session.py
+
+import pytest
+from calculateur import questionnaire
+from calculateur.session import FootprintSession
+
+def full_result(plan, answers):
+    detailed, category_totals = plan.evaluate(plan.answer_vector(answers))
+    return plan.to_dicts(detailed, category_totals, answers)
+
+def test_updates_match_full_evaluation(base_files, answers):
+    plan = questionnaire.get_plan()
+    session = FootprintSession(plan, dict(answers))
+    for column, value in [('motorisation_km', 150), ('Gaz', 0), ('motorisation', 'Électrique'), ('motorisation', 'essence')]:
+        answers[column] = value
+        before = session.total()
+        change = session.update(column, value)
+        assert session.total() == pytest.approx(before + change)
+        detailed_emissions, category_emissions = session.result()
+        expected_detailed, expected_categories = full_result(plan, answers)
+        assert detailed_emissions == pytest.approx(expected_detailed)
+        assert category_emissions == pytest.approx(expected_categories)
+        assert session.total() == pytest.approx(sum(expected_detailed.values()))
+
+def test_unknown_answer(base_files):
+    session = FootprintSession(questionnaire.get_plan())
+    with pytest.raises(ValueError):
+        session.update('trottinette', 3)
+
+def test_unknown_choice(base_files, answers):
+    session = FootprintSession(questionnaire.get_plan(), answers)
+    total = session.total()
+    with pytest.raises(ValueError):
+        session.update('motorisation', 'diesel')
+    assert session.answers['motorisation'] == 'essence' and session.total() == total
@@ -0,0 +1,64 @@
+# test_store.py
+
+import pytest
+import pandas as pd
+from calculateur import calculator
+from calculateur import data
+from calculateur import questionnaire
+from calculateur.store import FactorStore
+
+def test_import_and_query(base_files):
+    base_sample = data.get_base_sample()
+    store = FactorStore(':memory:')
+    counts = store.import_release('v17', base_sample)
+    assert counts == {'removed': 0, 'changed': 0, 'added': len(base_sample), 'unchanged': 0}
+    plan = store.plan('v17')
+    reference = questionnaire.get_plan()
+    assert plan.sub_categories == reference.sub_categories
+    assert plan.weights.tolist() == pytest.approx(reference.weights.tolist())
+    assert store.get(21737)['factor'] == 0.00369
+
+def test_incremental_release(base_files):
+    v17 = data.get_base_sample()
+    v18 = v17[v17['Identifiant de l\'élément'] != 21714].copy()
+    v18.loc[v18['Identifiant de l\'élément'] == 21737, 'Total poste non décomposé'] = 0.0029
+    v18 = pd.concat([v18, pd.DataFrame({'Identifiant de l\'élément': [99999], 'Nom base français': ['Vélo'],
+                                        'Unité français': ['kgCO2e/km'], 'Total poste non décomposé': [0.0],
+                                        'Nom attribut français': [None]})])
+    store = FactorStore(':memory:')
+    store.import_release('v17', v17)
+    counts = store.import_release('v18', v18)
+    assert counts == {'removed': 1, 'changed': 1, 'added': 1, 'unchanged': len(v17) - 2}
+    assert store.versions() == ['v17', 'v18']
+    assert store.get(21737, 'v17')['factor'] == 0.00369
+    assert store.get(21737)['factor'] == 0.0029
+    assert store.get(21714, 'v18') is None and store.get(21714, 'v17') is not None
+    assert store.factor_index('v18').lookup('Métro') is None
+    assert store.factor_index('v17').lookup('metro') == 0.0057
+
+def test_calculate_batch_by_version(base_files):
+    v17 = data.get_base_sample()
+    v18 = v17.copy()
+    v18.loc[v18['Nom base français'] == 'TGV', 'Total poste non décomposé'] = 0.01
+    store = FactorStore(':memory:')
+    store.import_release('v17', v17)
+    store.import_release('v18', v18)
+    responses = pd.DataFrame([{column: 1.0 for column in questionnaire.NUMERIC_INPUTS}])
+    assert calculator.calculate_batch(responses, plan=store.plan('v17'))[0]['TGV'].iloc[0] == 0.00369
+    assert calculator.calculate_batch(responses, plan=store.plan('v18'))[0]['TGV'].iloc[0] == 0.01
+
+def test_reordered_release(base_files):
+    v17 = data.get_base_sample()
+    # Les deux premieres lignes Avion échangées : la premiere ligne trouvée change
+    v18 = pd.concat([v17.iloc[[1, 0]], v17.iloc[2:]])
+    store = FactorStore(':memory:')
+    store.import_release('v17', v17)
+    assert store.import_release('v18', v18)['changed'] == 1
+    assert store.factor_index('v18').lookup('avion') == data.FactorIndex(v18).lookup('avion') == 0.23
+    assert store.factor_index('v17').lookup('avion') == 0.209
+    first = pd.DataFrame({'Identifiant de l\'élément': [99999], 'Nom base français': ['Avion'], 'Unité français': ['kgCO2e/km'],
+                         'Total poste non décomposé': [0.5], 'Nom attribut français': [None]})
+    counts = store.import_release('v19', pd.concat([first, v18]))
+    assert counts == {'removed': 0, 'changed': 0, 'added': 1, 'unchanged': len(v18)}
+    assert store.factor_index('v19').lookup('avion') == 0.5
+    assert store.factor_index('v18').lookup('avion') == 0.23
@@ -0,0 +1,31 @@
+# test_uncertainty.py
+
+import pytest
+import numpy as np
+import pandas as pd
+from calculateur import calculator
+from calculateur import questionnaire
+from calculateur.uncertainty import sample_factors, calculate_uncertainty, calculate_batch_uncertainty
+
+def test_sample_factors_spread(base_files):
+    plan = questionnaire.get_plan()
+    samples = sample_factors(plan, 20000, default_spread=0.2, spreads={'Gaz': 0.5}, seed=0)
+    assert samples.mean(axis=0) == pytest.approx(plan.weights, rel=0.02)
+    gaz = samples[:, plan.sub_categories.index('Gaz')] / plan.weights[plan.sub_categories.index('Gaz')]
+    assert np.quantile(gaz, 0.975) == pytest.approx(1.5, rel=0.05)
+
+def test_calculate_uncertainty_brackets_point_estimate(base_files, answers):
+    detailed_emissions, category_emissions = calculate_uncertainty(answers, n_samples=5000, seed=1)
+    point = calculator.calculate_batch(pd.DataFrame([answers]))[1].iloc[0]
+    for category, interval in category_emissions.items():
+        assert interval['low'] <= point[category] <= interval['high']
+        assert interval['mean'] == pytest.approx(point[category], rel=0.05)
+    assert 'voiture_électrique' not in detailed_emissions
+
+def test_batch_uncertainty_chunks(base_files, answers):
+    responses = pd.DataFrame([dict(answers, avion=i * 100) for i in range(7)])
+    whole = calculate_batch_uncertainty(responses, n_samples=1000, seed=2)
+    chunked = calculate_batch_uncertainty(responses, n_samples=1000, seed=2, max_bytes=1)
+    pd.testing.assert_frame_equal(whole[0], chunked[0])
+    pd.testing.assert_frame_equal(whole[1], chunked[1])
+    assert whole[1][('transport', 'low')].is_monotonic_increasing
@@ -0,0 +1,52 @@
+'''
+Benchmark de RollingLeastSquares sur l'année 2020 eCO2mix (pas de 15 minutes, fenêtre de 7 jours)
+comparé à un ajustement OrdinaryLeastSquares par fenêtre sur un échantillon de fenêtres.
+
+Execution : python benchmarks/bench_rolling.py --window 672
+'''
+
+import os
+import sys
+import time
+import argparse
+import warnings
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from linearmodel.load_data import load_and_clean_data
+from linearmodel.reg import OrdinaryLeastSquares, RollingLeastSquares
+
+DATA = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'linearmodel', 'eCO2mix_RTE_Annuel-Definitif_2020.csv')
+COLUMNS = ['Consommation', 'Nucléaire', 'Charbon', 'Hydraulique', 'Gaz', 'Bioénergies', 'Fioul']
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la régression sur fenêtre glissante")
+    parser.add_argument('--window', type=int, default=672)
+    parser.add_argument('--refits', type=int, default=200, help="fenêtres réajustées par OrdinaryLeastSquares pour comparaison")
+    arguments = parser.parse_args()
+    data = load_and_clean_data(DATA)
+    X, y = data[COLUMNS].values, data['Taux de Co2'].values
+
+    start = time.perf_counter()
+    coefficients, standard_errors, r_squared = RollingLeastSquares(arguments.window).fit(X, y)
+    rolling_seconds = time.perf_counter() - start
+
+    windows = np.linspace(0, len(coefficients) - 1, arguments.refits).astype(int)
+    error = 0.0
+    start = time.perf_counter()
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        for t in windows:
+            model = OrdinaryLeastSquares()
+            model.fit(X[t:t + arguments.window], y[t:t + arguments.window])
+            error = max(error, np.max(np.abs(coefficients[t] - model.coefficients) / np.abs(model.coefficients)))
+    refit_seconds = (time.perf_counter() - start) / len(windows) * len(coefficients)
+
+    print(f"{len(coefficients)} fenêtres de {arguments.window} lignes")
+    print(f"RollingLeastSquares : {rolling_seconds:.3f} s")
+    print(f"Réajustement de chaque fenêtre (estimé) : {refit_seconds:.3f} s")
+    print(f"Écart relatif maximal des coefficients : {error:.1e}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+'''
+Benchmark des méthodes de résolution de OrdinaryLeastSquares.fit sur des données synthétiques
+proches des colonnes de production eCO2mix (ordres de grandeur différents, colonnes très corrélées).
+Pour chaque taille n et chaque méthode : temps d'ajustement et écart relatif des coefficients
+à la solution de référence (SVD). L'ancienne formule inv(X'X) X'y est mesurée pour comparaison.
+
+Execution : python benchmarks/bench_solvers.py --sizes 1000 10000 100000 1000000 10000000 --output solvers.json
+(10^7 lignes demandent environ 2 Go de mémoire pour la méthode QR)
+'''
+
+import os
+import sys
+import json
+import time
+import argparse
+import warnings
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from linearmodel.reg import OrdinaryLeastSquares
+
+SIZES = [10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6, 10 ** 7]
+SOLVERS = ['cholesky', 'qr', 'svd']
+# Ordre de grandeur des colonnes (Consommation, Nucléaire, Charbon, Hydraulique, Gaz, Bioénergies, Fioul)
+SCALES = np.array([55000, 40000, 100, 7000, 5000, 1000, 200])
+
+def generate(n, seed=0):
+    '''
+    Retourne: (X, y, coefficients utilisés pour générer y)
+    '''
+    rng = np.random.default_rng(seed)
+    # Un facteur commun (la demande) rend les colonnes très corrélées
+    demand = rng.normal(size=(n, 1))
+    X = SCALES * (1 + 0.2 * demand + 0.05 * rng.normal(size=(n, len(SCALES))))
+    coefficients = np.concatenate(([5.0], 1 / SCALES))
+    y = coefficients[0] + X @ coefficients[1:] + rng.normal(size=n)
+    return X, y, coefficients
+
+def inverse_fit(X, y):
+    # Formule d'origine de fit
+    X_with_intercept = np.column_stack((np.ones(len(X)), X))
+    return np.linalg.inv(X_with_intercept.T @ X_with_intercept) @ X_with_intercept.T @ y
+
+def timed(function, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+def run(sizes=SIZES, repeat=3):
+    '''
+    Retourne: dictionnaire {n: {méthode: {'seconds', 'relative_error'}}}
+    '''
+    results = {}
+    for n in sizes:
+        X, y, _ = generate(n)
+        repeat_n = repeat if n < 10 ** 7 else 1
+        fits = {}
+        for solver in SOLVERS:
+            model = OrdinaryLeastSquares(solver=solver)
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore')
+                fits[solver] = timed(lambda: (model.fit(X, y), model.coefficients)[1], repeat_n)
+        fits['inverse'] = timed(lambda: inverse_fit(X, y), repeat_n)
+        reference = fits['svd'][1]
+        results[str(n)] = {name: {'seconds': seconds,
+                                  'relative_error': float(np.max(np.abs(coefficients - reference) / np.abs(reference)))}
+                           for name, (seconds, coefficients) in fits.items()}
+        del X, y
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark des méthodes de résolution des moindres carrés")
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', default='bench_solvers.json')
+    arguments = parser.parse_args()
+    results = run(arguments.sizes, arguments.repeat)
+    with open(arguments.output, 'w', encoding='utf-8') as file:
+        json.dump({'numpy': np.__version__, 'results': results}, file, indent=2)
+    for n, fits in results.items():
+        print(f"n={n}")
+        for name, result in fits.items():
+            print(f"    {name:10s} {result['seconds'] * 1000:10.2f} ms   écart relatif {result['relative_error']:.1e}")
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,5 @@
 '''
-    Lire un fihier csv et le nettoyer
+    Lire un fihier csv et le nettoyer, en entier (load_and_clean_data) ou par morceaux (read_chunks)
 '''
 import pandas as pd
 
@@ -15,6 +15,26 @@ def load_and_clean_data(filepath):
         pd.DataFrame: Un DataFrame pandas nettoyé.
     """
     data = pd.read_csv(filepath, delimiter=';')
+    return clean_data(data)
+
+def clean_data(data):
+    """
+    Remplace les valeurs NaN par 0 et convertit la colonne 'Heures' en heures (datetime.time).
+
+    Retourne:
+        pd.DataFrame: Le DataFrame nettoyé.
+    """
     data.fillna(0,inplace=True)
     data['Heures'] = pd.to_datetime(data['Heures'], format='%H:%M').dt.time
     return data
+
+def read_chunks(filepath, chunksize=100000):
+    """
+    Lit le fichier CSV par morceaux de chunksize lignes, nettoyés comme avec load_and_clean_data.
+    Permet d'ajuster un modèle (OrdinaryLeastSquares.partial_fit) sur un fichier qui ne tient pas en mémoire.
+
+    Retourne:
+        Itérateur de pd.DataFrame nettoyés.
+    """
+    for chunk in pd.read_csv(filepath, delimiter=';', chunksize=chunksize):
+        yield clean_data(chunk)
@@ -1,39 +1,240 @@
 ''' 
     Class OrdinaryLeastSquares permettant de tracer une regression linéaire par moindre carré.
     Methode constituant la class:
-    - fit : Calcule l'estimateur des moindres carrés.
+    - fit : Calcule l'estimateur des moindres carrés (solver : 'cholesky', 'qr' ou 'svd').
+    - partial_fit : Ajoute un morceau de données aux statistiques suffisantes (données qui ne tiennent pas en mémoire)
+    - finalize : Calcule l'estimateur à partir des morceaux ajoutés par partial_fit
     - predict: Retourne les predictions du modéle
     - get_coeffs: Retourne les coefficients estimés
+    - standard_errors: Retourne les erreurs standards de tous les coefficients à partir des statistiques gardées par fit
     - calculate_standard_errors: Retourne les erreurs standards associées aux coefficients
     - calculate_t_statistics: Retourne les statistique de test t-test
     - coefficient_determination: Retourne le coefficient de determination
     - _print_results : Affiche les coefficients, leurs erreurs et leur statistiques de test associé ainsi que le coefficient de determination
     - visualise_result : Affiche sur un même graphique les observation et les predictions
     -  visualiser : Affiche un nuage de points des predictions selon les observations
+
+    Class RecursiveLeastSquares : moindres carrés récursifs mis à jour observation par observation (facteur d'oubli optionnel)
     '''
 
+import os
+import json
+import warnings
 import seaborn as sns
 import matplotlib.pyplot as plt
 import pandas as pd
 import numpy as np
 
+SOLVERS = ['cholesky', 'qr', 'svd', 'lstsq']
+BLOCK_ROWS = 65536  # lignes centrées à la fois pour accumuler la matrice de Gram
+
+def _cholesky_factor(gram):
+    '''
+    Factorise gram = L L' par Cholesky après mise à l'échelle de sa diagonale
+
+    Retourne: L (triangulaire inférieure), lève np.linalg.LinAlgError si gram n'est pas (numériquement) définie positive
+    '''
+    scale = np.sqrt(np.diag(gram))
+    scale[scale == 0] = 1.0
+    lower = np.linalg.cholesky(gram / np.outer(scale, scale))
+    # Diagonale unité : le carré de chaque pivot est la part de la colonne non expliquée par les précédentes
+    if len(gram) and np.min(np.diag(lower)) ** 2 < len(gram) * np.finfo(float).eps:
+        raise np.linalg.LinAlgError("Matrice X'X singulière")
+    return scale[:, None] * lower
+
+def _centered_moments(X, y):
+    '''
+    Statistiques suffisantes centrées, X'X étant accumulé par blocs de lignes (sans recopier X entier)
+
+    Retourne: (n, moyennes de X, moyenne de y, X'X centré, X'y centré, somme des carrés de y centré)
+    '''
+    x_mean = X.mean(axis=0)
+    y_mean = y.mean()
+    gram = np.zeros((X.shape[1], X.shape[1]))
+    moment = np.zeros(X.shape[1])
+    y_squares = 0.0
+    for start in range(0, len(X), BLOCK_ROWS):
+        block = X[start:start + BLOCK_ROWS] - x_mean
+        y_block = y[start:start + BLOCK_ROWS] - y_mean
+        gram += block.T @ block
+        moment += block.T @ y_block
+        y_squares += y_block @ y_block
+    return len(y), x_mean, y_mean, gram, moment, y_squares
+
+def _merge_moments(first, second):
+    '''
+    Fusionne les statistiques centrées de deux ensembles de lignes (formule de Chan et al.) :
+    les sommes croisées sont corrigées de l'écart entre les moyennes, sans soustraire de grandes sommes brutes.
+    '''
+    n_a, x_mean_a, y_mean_a, gram_a, moment_a, y_squares_a = first
+    n_b, x_mean_b, y_mean_b, gram_b, moment_b, y_squares_b = second
+    n = n_a + n_b
+    dx = x_mean_b - x_mean_a
+    dy = y_mean_b - y_mean_a
+    weight = n_a * n_b / n
+    return (n, x_mean_a + dx * n_b / n, y_mean_a + dy * n_b / n, gram_a + gram_b + weight * np.outer(dx, dx),
+            moment_a + moment_b + weight * dx * dy, y_squares_a + y_squares_b + weight * dy * dy)
+
 class OrdinaryLeastSquares:
-    def __init__(self, intercept=True):
+    def __init__(self, intercept=True, solver='cholesky'):
 
         self.intercept = intercept
+        self.solver = solver
         self.coefficients = None
+        self._partial = None  # statistiques accumulées par partial_fit
+        self._reset()
 
-    def fit(self, X, y):
+    def _reset(self):
+        # Statistiques gardées par fit : les erreurs standards, t-stats et R² s'en déduisent sans relire X
+        self.n_observations = None
+        self.degrees_of_freedom = None
+        self.residual_sum_squares = None
+        self.total_sum_squares = None
+        self.y_mean = None
+        self._inverse_factor = None  # A tel que (X'X)^-1 = A A' (intercept compris), pseudo-inverse si X n'est pas de rang plein
+        self._standard_errors = None
+
+    def fit(self, X, y, solver=None):
         """
-        Calcule l'estimateur des moindres carrés.
+        Calcule l'estimateur des moindres carrés sans former l'inverse de X'X.
+        La factorisation, la somme des carrés des résidus, les degrés de liberté et les statistiques de y sont gardés
+        pour calculer erreurs standards, t-stats et R² sans relire X ; un nouvel appel à fit les remplace.
 
         Arguments:
         :param X: Matrice de données d'entraînement de dimension (n, d)
         :param y: Vecteur cible de dimension (n,)
+        :param solver: Méthode de résolution, par défaut celle donnée à la création du modèle :
+            - 'cholesky' : factorisation de Cholesky de la matrice de Gram (d+1, d+1), la plus rapide pour n grand.
+              Si la matrice n'est pas définie positive (variables colinéaires), la résolution passe par 'svd'.
+            - 'qr' : factorisation QR de la matrice de conception, plus précise quand les variables sont très corrélées.
+              Si X n'est pas de rang plein (variables colinéaires), la résolution passe par 'svd'.
+            - 'svd' ou 'lstsq' : décomposition en valeurs singulières, solution de norme minimale si X n'est pas de rang plein
         """
+        solver = solver or self.solver
+        if solver not in SOLVERS:
+            raise ValueError(f"solver doit être parmi {SOLVERS}")
+        self.coefficients = None
+        self._partial = None
+        self._reset()
+        X = np.asarray(X, dtype=float)
+        if X.ndim == 1:
+            X = X.reshape(-1, 1)
+        y = np.asarray(y, dtype=float)
+
+        if solver == 'cholesky':
+            try:
+                self._fit_cholesky(X, y)
+                return
+            except np.linalg.LinAlgError:
+                warnings.warn("Matrice X'X non définie positive (variables colinéaires) : résolution par SVD")
+                solver = 'svd'
+
         # Ajout d'une colonne de 1 pour le terme constant dans X
         X_with_intercept = np.column_stack((np.ones(len(X)), X))
-        self.coefficients = np.linalg.inv(X_with_intercept.T @ (X_with_intercept))@(X_with_intercept.T)@(y)
+        threshold = np.finfo(float).eps * max(X_with_intercept.shape)
+        if solver == 'qr':
+            Q, R = np.linalg.qr(X_with_intercept)
+            # |R_ii| / norme de la colonne i : part de la colonne non expliquée par les précédentes
+            norms = np.linalg.norm(X_with_intercept, axis=0)
+            norms[norms == 0] = 1.0
+            # Moins d'observations que de colonnes : R n'a que n pivots, le système est de rang incomplet
+            if len(R) < R.shape[1] or np.min(np.abs(np.diag(R)) / norms) < threshold:
+                warnings.warn("Matrice X de rang incomplet (variables colinéaires) : résolution par SVD")
+                solver = 'svd'
+            else:
+                self.coefficients = np.linalg.solve(R, Q.T @ y)
+                self._inverse_factor = np.linalg.solve(R, np.eye(len(R)))
+                rank = len(R)
+        if solver != 'qr':
+            U, singular_values, Vt = np.linalg.svd(X_with_intercept, full_matrices=False)
+            # Même seuil que np.linalg.lstsq(rcond=None)
+            kept = singular_values > threshold * singular_values[0]
+            inverse_values = np.where(kept, 1 / np.where(kept, singular_values, 1), 0.0)
+            self._inverse_factor = Vt.T * inverse_values
+            self.coefficients = self._inverse_factor @ (U.T @ y)
+            rank = int(kept.sum())
+        residuals = y - X_with_intercept @ self.coefficients
+        self.y_mean = y.mean()
+        self._set_statistics(len(y), rank, residuals @ residuals, np.sum((y - self.y_mean) ** 2))
+
+    def _fit_cholesky(self, X, y):
+        '''
+        Résout les équations normales par Cholesky sur les variables centrées : l'intercept est retrouvé
+        à partir des moyennes, ce qui évite le mauvais conditionnement dû aux grandes moyennes des colonnes.
+        '''
+        self._solve_centered(*_centered_moments(X, y))
+
+    def partial_fit(self, X_chunk, y_chunk):
+        '''
+        Ajoute un morceau de données aux statistiques suffisantes (n, moyennes, X'X, X'y et y'y centrés)
+        sans garder les lignes : la mémoire ne dépend pas du nombre de morceaux.
+        Les morceaux peuvent venir de load_data.read_chunks. finalize calcule ensuite les coefficients.
+
+        Arguments:
+        X_chunk: Matrice de dimension (m, d) d'un morceau
+        y_chunk: Vecteur de dimension (m,) du même morceau
+        '''
+        X_chunk = np.asarray(X_chunk, dtype=float)
+        if X_chunk.ndim == 1:
+            X_chunk = X_chunk.reshape(-1, 1)
+        y_chunk = np.asarray(y_chunk, dtype=float)
+        if len(y_chunk) == 0:
+            return
+        chunk = _centered_moments(X_chunk, y_chunk)
+        self._partial = chunk if self._partial is None else _merge_moments(self._partial, chunk)
+
+    def finalize(self):
+        '''
+        Calcule coefficients, erreurs standards et R² à partir des morceaux ajoutés par partial_fit,
+        comme fit sur toutes les lignes. D'autres morceaux peuvent être ajoutés puis finalize rappelée.
+        Si X'X n'est pas inversible (variables colinéaires), la solution de norme minimale est utilisée.
+        '''
+        if self._partial is None:
+            raise ValueError("Aucune donnée : appeler partial_fit avant finalize")
+        self.coefficients = None
+        self._reset()
+        try:
+            self._solve_centered(*self._partial)
+        except np.linalg.LinAlgError:
+            warnings.warn("Matrice X'X non définie positive (variables colinéaires) : solution de norme minimale")
+            self._solve_centered(*self._partial, pseudo_inverse=True)
+
+    def _solve_centered(self, n, x_mean, y_mean, gram, moment, y_squares, pseudo_inverse=False):
+        '''
+        Termine l'ajustement à partir des statistiques centrées : moyennes, X'X et X'y centrés, somme des carrés de y centré.
+        Lève np.linalg.LinAlgError si X'X centré n'est pas défini positif, sauf avec pseudo_inverse
+        (décomposition en valeurs propres, valeurs propres négligeables écartées).
+        '''
+        if pseudo_inverse:
+            values, vectors = np.linalg.eigh(gram)
+            kept = values > np.finfo(float).eps * len(gram) * max(values.max(initial=0.0), 0.0)
+            # M tel que M M' = pseudo-inverse de X'X centré
+            inverse_lower_t = vectors[:, kept] / np.sqrt(values[kept])
+            inverse_lower_t = np.hstack((inverse_lower_t, np.zeros((len(gram), len(gram) - kept.sum()))))
+            rank = int(kept.sum()) + 1
+        else:
+            lower = _cholesky_factor(gram)
+            # M = L'^-1 : (X'X centré)^-1 = M M'
+            inverse_lower_t = np.linalg.solve(lower, np.eye(len(lower))).T
+            rank = len(lower) + 1
+        slopes = inverse_lower_t @ (inverse_lower_t.T @ moment)
+        if not np.all(np.isfinite(slopes)):
+            raise np.linalg.LinAlgError("Résolution de Cholesky instable")
+        self.coefficients = np.concatenate(([y_mean - x_mean @ slopes], slopes))
+        # Avec l'intercept, X'X = R'R où R = [[sqrt(n), sqrt(n) x_mean'], [0, L']] : R^-1 s'écrit avec M
+        self._inverse_factor = np.zeros((len(gram) + 1, len(gram) + 1))
+        self._inverse_factor[0, 0] = 1 / np.sqrt(n)
+        self._inverse_factor[0, 1:] = -x_mean @ inverse_lower_t
+        self._inverse_factor[1:, 1:] = inverse_lower_t
+        self.y_mean = y_mean
+        # Somme des carrés des résidus : yc'yc - b'X'yc quand b résout les équations normales
+        self._set_statistics(n, rank, max(y_squares - slopes @ moment, 0.0), y_squares)
+
+    def _set_statistics(self, n, rank, residual_sum_squares, total_sum_squares):
+        self.n_observations = n
+        self.degrees_of_freedom = n - rank
+        self.residual_sum_squares = float(residual_sum_squares)
+        self.total_sum_squares = float(total_sum_squares)
 
     def predict(self, X):
         '''
@@ -68,9 +269,26 @@ class OrdinaryLeastSquares:
         """
         return self.coefficients
 
-    def calculate_standard_errors(self, X, y, y_pred):
+    def standard_errors(self):
+        """
+        Erreurs standards de tous les coefficients (intercept en premier), calculées en O(d²) à partir des statistiques
+        gardées par fit : sigma² = SCR / (n - rang) et diagonale de (X'X)^-1 = somme des carrés des lignes du facteur inverse.
+
+        Retourne: Vecteur des erreurs standards, None si le modèle n'est pas ajusté
         """
-        Calcule les erreurs standards à partir des résidus et de la matrice de conception.
+        if self._inverse_factor is None:
+            print("Le modèle n'est pas encore ajusté.")
+            return None
+        if self._standard_errors is None:
+            sigma_squared = self.residual_sum_squares / self.degrees_of_freedom if self.degrees_of_freedom > 0 else np.nan
+            self._standard_errors = np.sqrt(sigma_squared * np.sum(self._inverse_factor ** 2, axis=1))
+        return self._standard_errors
+
+    def calculate_standard_errors(self, X=None, y=None, y_pred=None):
+        """
+        Calcule les erreurs standards des coefficients hors intercept.
+        Sans argument, elles viennent des statistiques gardées par fit (sans relire X) ;
+        avec X, y et y_pred elles sont recalculées à partir de ces données.
 
         Arguments
         X: Matrice de conception du modèle
@@ -79,6 +297,9 @@ class OrdinaryLeastSquares:
         
         Retourne: Vecteur des erreurs standards
         """
+        if X is None:
+            standard_errors = self.standard_errors()
+            return standard_errors[1:] if standard_errors is not None else None
         residuals=y-y_pred
         n, k = X.shape
         sigma_squared = np.sum(residuals ** 2) / (n - k)  # Variance des résidus
@@ -86,26 +307,36 @@ class OrdinaryLeastSquares:
         standard_errors = np.sqrt(np.diag(covariance_matrix))
         return standard_errors
 
-    def calculate_t_statistics(self,coefficients, standard_errors):
+    def calculate_t_statistics(self, coefficients=None, standard_errors=None):
         """
         Calcule les statistiques t à partir des coefficients estimés et de leurs erreurs standards.
+        Sans argument, celles des coefficients hors intercept du modèle ajusté.
 
         Arguments:
         coefficients: Vecteur des coefficients estimés
         standard_errors: Vecteur des erreurs standard
         
-        Retourne: Vecteur des statistiques t
+        Retourne: Vecteur des statistiques t, None si le modèle n'est pas ajusté et qu'il manque un argument
         """
-
+        if self.coefficients is None and (coefficients is None or standard_errors is None):
+            print("Le modèle n'est pas encore ajusté.")
+            return None
+        if coefficients is None:
+            coefficients = self.coefficients[1:]
+        if standard_errors is None:
+            standard_errors = self.calculate_standard_errors()
         return coefficients / standard_errors
 
-    def coefficient_determination(self, X, y):
+    def coefficient_determination(self, X=None, y=None):
         ''' 
         Calcule le coefficient de determination
+        Sans argument, il vient des sommes de carrés gardées par fit ; avec X et y il est calculé sur ces données.
         '''
         if self.coefficients is None:
             print("Le modèle n'est pas encore ajusté.")
             return None
+        if X is None:
+            return 1 - (self.residual_sum_squares / self.total_sum_squares)
         X = np.hstack((np.ones((X.shape[0], 1)), X))
         y_pred = X @ self.coefficients
         ss_total = np.sum((y - np.mean(y)) ** 2)
@@ -113,23 +344,21 @@ class OrdinaryLeastSquares:
         r_squared = 1 - (ss_residual / ss_total)
         return r_squared
 
-    def _print_results(self,X,y,y_pred):
+    def _print_results(self, X=None, y=None, y_pred=None):
         """
         Affiche les résultats de l'estimation des moindres carrés.
-
-        X: Matrice de conception du modèle
-        y= Vecteur contenant les valeurs de la variable à expliquer
-        y_pred= Vecteur de prédictions
+        Les erreurs standards, t-stats et R² viennent des statistiques gardées par fit :
+        X, y et y_pred ne sont plus utilisés et restent acceptés pour les appels existants.
 
         Retourne: un sommaire des resultats
         """
+        err = self.calculate_standard_errors()
         print("Intercept:")
         print(f'{self.coefficients[0]}\n')
         print(f'Coefficients : {self.coefficients[1:]}\n')
-        print(f'std_error:{self.calculate_standard_errors(X,y,y_pred)}\n')
-        err=self.calculate_standard_errors(X,y,y_pred)
+        print(f'std_error:{err}\n')
         print(f't stat {self.calculate_t_statistics(self.coefficients[1:],err)}\n')
-        print(f'Coefficient de détermination: {self.coefficient_determination(X, y)}')
+        print(f'Coefficient de détermination: {self.coefficient_determination()}')
 
     def visualise_result(self, X, y):
         '''
@@ -179,3 +408,223 @@ class OrdinaryLeastSquares:
         plt.title('Régression Linéaire - Moindres Carrés')
         plt.savefig('Régression Linéaire - Moindres Carrés')
         plt.show()
+
+class RecursiveLeastSquares:
+    '''
+    Moindres carrés récursifs : les coefficients sont mis à jour à chaque nouvelle observation en O(d²)
+    par la formule de Sherman-Morrison appliquée à P = (X'X)^-1 (intercept compris), sans réajuster le modèle.
+    Avec un facteur d'oubli lambda < 1, le poids d'une observation est divisé par lambda à chaque nouvelle ligne :
+    le modèle suit un régime qui change (lambda = 0.999 donne une mémoire d'environ 1000 observations).
+    Methodes:
+    - warm_start : Initialise coefficients et P par un ajustement OrdinaryLeastSquares sur un historique
+    - update : Ajoute une observation
+    - update_many : Ajoute des observations dans l'ordre
+    - predict : Retourne les predictions
+    - to_dict / from_dict, save / load : État sérialisable (JSON) pour reprendre après un redémarrage
+    '''
+    def __init__(self, n_features, forgetting_factor=1.0, delta=1e6):
+        '''
+        Arguments:
+            n_features: Nombre de variables explicatives d (sans l'intercept)
+            forgetting_factor: Facteur d'oubli lambda dans ]0, 1], 1 pour les moindres carrés ordinaires
+            delta: P initiale = delta * I sans warm_start (grand delta : coefficients initiaux presque sans poids)
+        '''
+        if not 0 < forgetting_factor <= 1:
+            raise ValueError("forgetting_factor doit être dans ]0, 1]")
+        self.forgetting_factor = forgetting_factor
+        self.coefficients = np.zeros(n_features + 1)
+        self.P = np.eye(n_features + 1) * delta
+        self.n_observations = 0
+
+    def warm_start(self, X, y):
+        '''
+        Ajuste un modèle OrdinaryLeastSquares sur l'historique X, y et reprend ses coefficients et (X'X)^-1 :
+        avec forgetting_factor = 1, les mises à jour suivantes donnent ensuite exactement l'ajustement sur toutes les lignes.
+        '''
+        model = OrdinaryLeastSquares()
+        model.fit(X, y)
+        self.coefficients = model.coefficients.copy()
+        self.P = model._inverse_factor @ model._inverse_factor.T
+        self.n_observations = model.n_observations
+
+    def update(self, x, y):
+        '''
+        Ajoute une observation
+
+        Arguments:
+            x: Vecteur des d variables explicatives
+            y: Valeur observée
+
+        Retourne: Erreur de prédiction a priori (y - prédiction avant la mise à jour)
+        '''
+        x = np.concatenate(([1.0], np.asarray(x, dtype=float).ravel()))
+        Px = self.P @ x
+        gain = Px / (self.forgetting_factor + x @ Px)
+        error = float(y) - x @ self.coefficients
+        self.coefficients = self.coefficients + gain * error
+        self.P = (self.P - np.outer(gain, Px)) / self.forgetting_factor
+        # Garde P symétrique malgré les arrondis
+        self.P = (self.P + self.P.T) / 2
+        self.n_observations += 1
+        return error
+
+    def update_many(self, X, y):
+        '''
+        Retourne: Vecteur des erreurs de prédiction a priori
+        '''
+        X = np.asarray(X, dtype=float)
+        if X.ndim == 1:
+            X = X.reshape(-1, 1)
+        return np.array([self.update(x, target) for x, target in zip(X, np.asarray(y, dtype=float))])
+
+    def predict(self, X):
+        X = np.asarray(X, dtype=float)
+        if X.ndim == 1:
+            X = X.reshape(-1, 1)
+        return self.coefficients[0] + X @ self.coefficients[1:]
+
+    def to_dict(self):
+        '''
+        Retourne: l'état sous forme de dictionnaire sérialisable en JSON
+        '''
+        return {'forgetting_factor': self.forgetting_factor, 'coefficients': self.coefficients.tolist(),
+                'P': self.P.tolist(), 'n_observations': self.n_observations}
+
+    @classmethod
+    def from_dict(cls, state):
+        model = cls(len(state['coefficients']) - 1, state['forgetting_factor'])
+        model.coefficients = np.array(state['coefficients'], dtype=float)
+        model.P = np.array(state['P'], dtype=float)
+        model.n_observations = state['n_observations']
+        return model
+
+    def save(self, path):
+        '''
+        Enregistre l'état dans un fichier JSON, écrit sous un nom temporaire puis renommé (jamais de fichier incomplet)
+        '''
+        temporary_path = f'{path}.tmp'
+        with open(temporary_path, 'w', encoding='utf-8') as file:
+            json.dump(self.to_dict(), file)
+        os.replace(temporary_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding='utf-8') as file:
+            return cls.from_dict(json.load(file))
+
+class RollingLeastSquares:
+    '''
+    Moindres carrés sur une fenêtre glissante de données ordonnées dans le temps (par exemple 7 jours de lignes eCO2mix).
+    La matrice de Gram d'une fenêtre est celle de la fenêtre précédente plus la ligne qui entre et moins celle qui sort
+    (mises à jour de rang 1) : pour toutes les fenêtres à la fois, c'est une différence de sommes cumulées.
+    Les données sont d'abord décalées de leur moyenne globale pour limiter les erreurs d'arrondi des sommes cumulées,
+    puis chaque fenêtre est résolue sur ses variables centrées, toutes les fenêtres en une seule opération NumPy.
+    Methode:
+    - fit : Retourne les coefficients, erreurs standards et R² de chaque fenêtre
+    '''
+    def __init__(self, window):
+        '''
+        Arguments:
+            window: Nombre de lignes de chaque fenêtre (672 pour 7 jours au pas de 15 minutes)
+        '''
+        self.window = window
+        self.coefficients = None
+        self.standard_errors = None
+        self.r_squared = None
+
+    def fit(self, X, y):
+        '''
+        Ajuste le modèle sur chaque fenêtre X[t - window + 1 : t + 1], pour t de window - 1 à n - 1.
+        Une fenêtre où X'X n'est pas inversible (variable constante sur la fenêtre) reçoit la solution de norme minimale.
+
+        Arguments:
+            X: Matrice de dimension (n, d), lignes ordonnées dans le temps
+            y: Vecteur de dimension (n,)
+
+        Retourne: (coefficients (n - window + 1, d + 1) intercept en premier,
+                   erreurs standards (n - window + 1, d + 1), R² (n - window + 1,))
+        '''
+        X = np.asarray(X, dtype=float)
+        if X.ndim == 1:
+            X = X.reshape(-1, 1)
+        y = np.asarray(y, dtype=float)
+        n, d = X.shape
+        if not d + 1 < self.window <= n:
+            raise ValueError("window doit être supérieure à d + 1 et inférieure au nombre de lignes")
+        x_shift = X.mean(axis=0)
+        y_shift = y.mean()
+        Z = np.column_stack((X - x_shift, y - y_shift))
+        # Sommes par fenêtre de z, z z' : ajout de la ligne qui entre, retrait de celle qui sort
+        sums = _window_sums(Z, self.window)
+        products = _window_sums((Z[:, :, None] * Z[:, None, :]).reshape(n, -1), self.window).reshape(-1, d + 1, d + 1)
+        means = sums / self.window
+        centered = products - self.window * means[:, :, None] * means[:, None, :]
+        gram, moment, y_squares = centered[:, :d, :d], centered[:, :d, d], centered[:, d, d]
+
+        inverse_gram, rank = _batch_inverse(gram)
+
+        slopes = np.einsum('wij,wj->wi', inverse_gram, moment)
+        x_mean = means[:, :d] + x_shift
+        intercept = means[:, d] + y_shift - np.einsum('wi,wi->w', x_mean, slopes)
+        residual_sum_squares = np.maximum(y_squares - np.einsum('wi,wi->w', slopes, moment), 0)
+        degrees_of_freedom = self.window - rank - 1
+        sigma_squared = residual_sum_squares / degrees_of_freedom
+        intercept_variance = 1 / self.window + np.einsum('wi,wij,wj->w', x_mean, inverse_gram, x_mean)
+
+        self.coefficients = np.column_stack((intercept, slopes))
+        self.standard_errors = np.sqrt(sigma_squared[:, None] * np.column_stack(
+            (intercept_variance, np.diagonal(inverse_gram, axis1=1, axis2=2))))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self.r_squared = 1 - residual_sum_squares / y_squares
+        return self.coefficients, self.standard_errors, self.r_squared
+
+def _window_sums(values, window):
+    '''
+    Sommes des lignes de values sur chaque fenêtre de window lignes consécutives.
+    Les sommes cumulées repartent de zéro tous les window lignes : une fenêtre est la fin d'un bloc (somme des suffixes)
+    plus le début du bloc suivant (somme des préfixes), l'erreur d'arrondi reste celle d'une somme de window lignes.
+
+    Retourne: tableau (len(values) - window + 1, ...)
+    '''
+    n = len(values)
+    blocks = -(-n // window)
+    padded = np.zeros((blocks * window,) + values.shape[1:])
+    padded[:n] = values
+    padded = padded.reshape((blocks, window) + values.shape[1:])
+    prefix = np.cumsum(padded, axis=1)
+    # suffix[k, j] = somme des lignes j+1 à window-1 du bloc k
+    suffix = np.zeros_like(padded)
+    suffix[:, :-1] = np.cumsum(padded[:, :0:-1], axis=1)[:, ::-1]
+    sums = np.concatenate((prefix[:1, -1], (prefix[1:] + suffix[:-1]).reshape((-1,) + values.shape[1:])))
+    return sums[:n - window + 1]
+
+def _batch_inverse(gram):
+    '''
+    Inverse d'une pile de matrices de Gram (diagonale mise à l'échelle) par Cholesky.
+    Les matrices qui ne sont pas (numériquement) définies positives reçoivent leur pseudo-inverse par valeurs propres.
+
+    Retourne: (inverses, rang de chaque matrice)
+    '''
+    d = gram.shape[-1]
+    scale = np.sqrt(np.maximum(np.diagonal(gram, axis1=1, axis2=2), 0))
+    scale[scale == 0] = 1.0
+    outer_scale = scale[:, :, None] * scale[:, None, :]
+    scaled = gram / outer_scale
+    inverse = np.empty_like(scaled)
+    rank = np.full(len(gram), d)
+    try:
+        lower = np.linalg.cholesky(scaled)
+        singular = np.min(np.diagonal(lower, axis1=1, axis2=2), axis=1) ** 2 < d * np.finfo(float).eps
+    except np.linalg.LinAlgError:
+        lower = None
+        singular = np.ones(len(gram), dtype=bool)
+    if lower is not None:
+        inverse_lower = np.linalg.inv(lower[~singular])
+        inverse[~singular] = inverse_lower.transpose(0, 2, 1) @ inverse_lower
+    if singular.any():
+        values, vectors = np.linalg.eigh(scaled[singular])
+        kept = values > np.finfo(float).eps * d * values.max(axis=1, keepdims=True)
+        inverse_values = np.where(kept, 1 / np.where(kept, values, 1), 0.0)
+        inverse[singular] = (vectors * inverse_values[:, None, :]) @ vectors.transpose(0, 2, 1)
+        rank[singular] = kept.sum(axis=1)
+    return inverse / outer_scale, rank
@@ -53,4 +53,156 @@ def test_calculate_standard_errors():
     y_pred = model.predict(X)
     errors = model.calculate_standard_errors(X, y, y_pred)
     assert errors is not None
-    assert len(errors) == len(model.coefficients)-1
\ No newline at end of file
+    assert len(errors) == len(model.coefficients)-1
+
+@pytest.mark.parametrize("solver", ['cholesky', 'qr', 'svd'])
+def test_solvers_recover_coefficients(solver):
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(500, 3)) * [1, 1000, 0.01]
+    y = 2 + X @ np.array([0.5, -0.003, 40.0])
+    model = OrdinaryLeastSquares(solver=solver)
+    model.fit(X, y)
+    assert np.allclose(model.coefficients, [2, 0.5, -0.003, 40.0])
+
+@pytest.mark.parametrize("solver", ['cholesky', 'qr'])
+def test_collinear_falls_back_to_svd(solver):
+    X = np.array([[1, 1], [2, 3], [3, 5], [4, 7]])
+    y = np.array([1, 2, 3, 4])
+    model = OrdinaryLeastSquares(solver=solver)
+    with pytest.warns(UserWarning):
+        model.fit(X, y)
+    assert np.allclose(model.predict(X), y)
+    reference = OrdinaryLeastSquares(solver='svd')
+    reference.fit(X, y)
+    assert np.allclose(model.coefficients, reference.coefficients)
+
+@pytest.mark.parametrize("solver", ['cholesky', 'qr'])
+def test_fewer_rows_than_columns_uses_svd(solver):
+    X = np.array([[1., 2., 0., 1.], [0., 1., 3., 2.], [2., 0., 1., 5.]])
+    y = np.array([1., 2., 3.])
+    model = OrdinaryLeastSquares(solver=solver)
+    with pytest.warns(UserWarning):
+        model.fit(X, y)
+    reference = OrdinaryLeastSquares(solver='svd')
+    reference.fit(X, y)
+    # Solution de norme minimale, comme np.linalg.lstsq
+    assert np.allclose(model.coefficients, reference.coefficients)
+    assert np.allclose(model.coefficients, np.linalg.lstsq(np.column_stack((np.ones(3), X)), y, rcond=None)[0])
+
+def test_unfitted_model_statistics():
+    model = OrdinaryLeastSquares()
+    assert model.standard_errors() is None
+    assert model.calculate_t_statistics() is None
+    assert np.allclose(model.calculate_t_statistics(np.array([2.0]), np.array([0.5])), [4.0])
+
+def test_unknown_solver():
+    with pytest.raises(ValueError):
+        OrdinaryLeastSquares().fit(np.ones((3, 1)), np.ones(3), solver='inverse')
+
+@pytest.mark.parametrize("solver", ['cholesky', 'qr', 'svd'])
+def test_cached_statistics_match_direct_formulas(solver):
+    rng = np.random.default_rng(1)
+    X = rng.normal(size=(200, 3)) * [1, 100, 0.1] + [0, 5000, 3]
+    y = 1 + X @ np.array([2.0, 0.01, -5.0]) + rng.normal(size=200)
+    model = OrdinaryLeastSquares(solver=solver)
+    model.fit(X, y)
+    X_with_intercept = np.column_stack((np.ones(len(X)), X))
+    residuals = y - X_with_intercept @ model.coefficients
+    sigma_squared = residuals @ residuals / (len(y) - 4)
+    expected = np.sqrt(np.diag(np.linalg.inv(X_with_intercept.T @ X_with_intercept)) * sigma_squared)
+    assert np.allclose(model.standard_errors(), expected)
+    assert np.allclose(model.calculate_t_statistics(), model.coefficients[1:] / expected[1:])
+    assert model.coefficient_determination() == pytest.approx(model.coefficient_determination(X, y))
+    assert model.degrees_of_freedom == 196
+
+def test_refit_invalidates_cache():
+    rng = np.random.default_rng(2)
+    X = rng.normal(size=(100, 2))
+    model = OrdinaryLeastSquares()
+    model.fit(X, X @ [1.0, 2.0] + rng.normal(size=100))
+    first = model.standard_errors().copy()
+    model.fit(X[:50], X[:50] @ [1.0, 2.0] + 10 * rng.normal(size=50))
+    assert model.n_observations == 50
+    assert not np.allclose(model.standard_errors(), first)
+
+def test_partial_fit_matches_fit():
+    import os
+    from linearmodel.load_data import load_and_clean_data, read_chunks
+    path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'linearmodel', 'eCO2mix_RTE_Annuel-Definitif_2020.csv')
+    columns = ['Consommation', 'Nucléaire', 'Charbon', 'Hydraulique', 'Gaz', 'Bioénergies', 'Fioul']
+    data = load_and_clean_data(path)
+    model = OrdinaryLeastSquares()
+    model.fit(data[columns].values, data['Taux de Co2'].values)
+    online = OrdinaryLeastSquares()
+    for chunk in read_chunks(path, chunksize=5000):
+        online.partial_fit(chunk[columns].values, chunk['Taux de Co2'].values)
+    online.finalize()
+    assert online.n_observations == len(data)
+    assert np.allclose(online.coefficients, model.coefficients, rtol=1e-9)
+    assert np.allclose(online.standard_errors(), model.standard_errors(), rtol=1e-9)
+    assert online.coefficient_determination() == pytest.approx(model.coefficient_determination(), rel=1e-12)
+
+def test_finalize_collinear_and_empty():
+    model = OrdinaryLeastSquares()
+    with pytest.raises(ValueError):
+        model.finalize()
+    X = np.array([[1, 1], [2, 3], [3, 5], [4, 7]])
+    model.partial_fit(X[:2], [1, 2])
+    model.partial_fit(X[2:], [3, 4])
+    with pytest.warns(UserWarning):
+        model.finalize()
+    assert np.allclose(model.predict(X), [1, 2, 3, 4])
+
+def test_recursive_least_squares_matches_fit(tmp_path):
+    from linearmodel.reg import RecursiveLeastSquares
+    rng = np.random.default_rng(3)
+    X = rng.normal(size=(300, 3)) * [1, 1000, 0.1] + [0, 50000, 2]
+    y = 4 + X @ np.array([1.5, 0.002, -3.0]) + rng.normal(size=300)
+    online = RecursiveLeastSquares(3)
+    online.warm_start(X[:100], y[:100])
+    online.update_many(X[100:200], y[100:200])
+    # Reprise après un redémarrage
+    online.save(tmp_path / 'rls.json')
+    online = RecursiveLeastSquares.load(tmp_path / 'rls.json')
+    online.update_many(X[200:], y[200:])
+    model = OrdinaryLeastSquares()
+    model.fit(X, y)
+    assert online.n_observations == 300
+    assert np.allclose(online.coefficients, model.coefficients, rtol=1e-6)
+    assert np.allclose(online.predict(X[:5]), model.predict(X[:5]))
+
+def test_forgetting_factor_tracks_change():
+    from linearmodel.reg import RecursiveLeastSquares
+    rng = np.random.default_rng(4)
+    X = rng.normal(size=(2000, 1))
+    y = np.where(np.arange(2000) < 1000, 1.0, 3.0) * X[:, 0]
+    forgetting = RecursiveLeastSquares(1, forgetting_factor=0.98)
+    forgetting.update_many(X, y)
+    assert forgetting.coefficients[1] == pytest.approx(3.0, abs=1e-6)
+    with pytest.raises(ValueError):
+        RecursiveLeastSquares(1, forgetting_factor=1.5)
+
+def test_rolling_matches_window_fits():
+    from linearmodel.reg import RollingLeastSquares
+    rng = np.random.default_rng(5)
+    X = rng.normal(size=(400, 2)) * [1000, 1] + [50000, 0]
+    y = 3 + X @ np.array([0.001, 2.0]) + np.sin(np.arange(400) / 50) * X[:, 1] + rng.normal(size=400)
+    coefficients, standard_errors, r_squared = RollingLeastSquares(100).fit(X, y)
+    assert coefficients.shape == (301, 3)
+    for start in [0, 1, 99, 100, 150, 300]:
+        model = OrdinaryLeastSquares(solver='qr')
+        model.fit(X[start:start + 100], y[start:start + 100])
+        assert np.allclose(coefficients[start], model.coefficients, rtol=1e-8)
+        assert np.allclose(standard_errors[start], model.standard_errors(), rtol=1e-8)
+        assert r_squared[start] == pytest.approx(model.coefficient_determination())
+
+def test_rolling_constant_column_and_window():
+    from linearmodel.reg import RollingLeastSquares
+    X = np.column_stack((np.arange(50.0), np.r_[np.zeros(30), np.arange(20.0)]))
+    y = 1 + 2 * X[:, 0]
+    coefficients, standard_errors, r_squared = RollingLeastSquares(10).fit(X, y)
+    # Seconde variable nulle sur les premières fenêtres : solution de norme minimale
+    assert np.allclose(coefficients[0], [1, 2, 0])
+    assert np.all(np.isfinite(coefficients))
+    with pytest.raises(ValueError):
+        RollingLeastSquares(60).fit(X, y)